@@ -1,34 +1,96 @@
-import matplotlib.pyplot as plt
+import argparse
+import os
+from multiprocessing import Pool
 
-def tratar_offsets(arquivo_entrada, arquivo_saida, thr):
+import numpy as np
+
+# ================= Correção de Offsets (Picos) =================
+# Regra: se o valor muda mais que `thr` em relação ao anterior (já corrigido), é substituído pela
+# média inteira dos dois anteriores (já corrigidos). Os dois primeiros valores nunca são alterados.
+
+class CorretorOffsets:
+    """Aplica a correção amostra a amostra, guardando só as duas últimas amostras corrigidas."""
+
+    def __init__(self, thr):
+        self.thr = thr
+        self.anteriores = []   # até 2 valores corrigidos, do mais antigo para o mais recente
+
+    def corrigir(self, valor):
+        if len(self.anteriores) == 2:
+            anterior2, anterior = self.anteriores
+            if abs(valor - anterior) > self.thr:
+                valor = (anterior2 + anterior) // 2
+            self.anteriores[0] = anterior
+            self.anteriores[1] = valor
+        else:
+            self.anteriores.append(valor)
+        return valor
+
+def corrigir_offsets_array(valores, thr):
+    """Mesma correção de `CorretorOffsets` sobre um array inteiro.
+
+    A regra depende dos valores já corrigidos, então não é puramente vetorizável; os saltos são
+    localizados com NumPy e o laço em Python percorre só esses pontos e as correções em cadeia.
+    """
+    bruto = np.asarray(valores, dtype=np.int64)
+    corrigido = bruto.copy()
+    if len(bruto) < 3:
+        return corrigido
+    suspeitos = np.flatnonzero(np.abs(np.diff(bruto)) > thr) + 1
+    suspeitos = suspeitos[suspeitos >= 2].tolist()
+    k = 0
+    i = suspeitos[0] if suspeitos else len(bruto)
+    while i < len(bruto):
+        anterior = int(corrigido[i - 1])
+        if abs(int(bruto[i]) - anterior) > thr:
+            corrigido[i] = (int(corrigido[i - 2]) + anterior) // 2
+        # Se i (ou i-1) ficou diferente do valor bruto, i+1 precisa ser reavaliado com os corrigidos
+        if corrigido[i] != bruto[i] or corrigido[i - 1] != bruto[i - 1]:
+            i += 1
+            continue
+        while k < len(suspeitos) and suspeitos[k] <= i:
+            k += 1
+        i = suspeitos[k] if k < len(suspeitos) else len(bruto)
+    return corrigido
+
+def _separar_linha(linha):
+    # "HH:MM:SS, valor[, códigos]" ou, no registro RLE, "início, fim, valor": o trecho inteiro é uma amostra
+    partes = linha.strip().split(', ')
+    if len(partes) >= 3 and ':' in partes[1]:
+        return f'{partes[0]}, {partes[1]}', int(partes[2])
+    return partes[0], int(partes[1])
+
+def tratar_offsets_streaming(arquivo_entrada, arquivo_saida, thr):
+    """Lê e grava linha a linha; memória constante, adequado a logs de vários dias."""
+    corretor = CorretorOffsets(thr)
+    n = 0
+    with open(arquivo_entrada, 'r') as entrada, open(arquivo_saida, 'w') as saida:
+        for linha in entrada:
+            if not linha.strip():
+                continue
+            data_hora, temperatura = _separar_linha(linha)
+            saida.write(f'{data_hora}, {corretor.corrigir(temperatura)}\n')
+            n += 1
+    return n
+
+def tratar_offsets_vetorizado(arquivo_entrada, arquivo_saida, thr):
+    """Carrega o arquivo inteiro em arrays NumPy; mais rápido para arquivos que cabem na memória."""
     with open(arquivo_entrada, 'r') as entrada:
-        linhas = entrada.readlines()
-    
-    temperaturas = []
-    for linha in linhas:
-        partes = linha.strip().split(', ')
-        data_hora = partes[0]
-        temperatura = int(partes[1])
-        temperaturas.append((data_hora, temperatura))
-    
-    temperaturas_tratadas = []  # Lista para armazenar as temperaturas tratadas
-    
-    for i in range(2, len(temperaturas)):
-        temp_atual = temperaturas[i][1]
-        temp_anterior = temperaturas[i-1][1]
-        
-        # Verifica se a mudança é maior que o threshold
-        if abs(temp_atual - temp_anterior) > thr:
-            # Calcula a média dos dois valores anteriores válidos
-            media = (temperaturas[i-2][1] + temperaturas[i-1][1]) // 2
-            temperaturas[i] = (temperaturas[i][0], media)
-    
+        linhas = [linha for linha in entrada.read().splitlines() if linha.strip()]
+    separadas = [_separar_linha(linha) for linha in linhas]
+    datas = [data_hora for data_hora, _ in separadas]
+    temperaturas = np.array([temperatura for _, temperatura in separadas], dtype=np.int64)
+    corrigidas = corrigir_offsets_array(temperaturas, thr)
     with open(arquivo_saida, 'w') as saida:
-        for data_hora, temperatura in temperaturas:
-            saida.write(f'{data_hora}, {temperatura}\n')
-            temperaturas_tratadas.append(temperatura)  # Adiciona a temperatura tratada à lista
-    
-    # Plotando o gráfico dos resultados finais
+        saida.writelines(f'{data_hora}, {temperatura}\n' for data_hora, temperatura in zip(datas, corrigidas.tolist()))
+    return len(linhas)
+
+def plotar_temperaturas(arquivo):
+    import matplotlib.pyplot as plt
+    temperaturas_tratadas = []
+    with open(arquivo, 'r') as entrada:
+        for linha in entrada:
+            temperaturas_tratadas.append(_separar_linha(linha)[1])
     plt.figure(figsize=(10, 5))  # Define o tamanho do gráfico
     plt.plot(temperaturas_tratadas, marker='o', linestyle='-', color='b')  # Plota as temperaturas tratadas
     plt.title("Temperaturas Tratadas")
@@ -37,10 +99,46 @@ def tratar_offsets(arquivo_entrada, arquivo_saida, thr):
     plt.grid(True)  # Adiciona uma grade ao gráfico para melhor visualização
     plt.show()  # Exibe o gráfico
 
-    # Pausa o programa até que uma tecla seja pressionada no console
-    input("Pressione qualquer tecla para continuar...")
+def tratar_offsets(arquivo_entrada, arquivo_saida, thr, modo='streaming', grafico=False):
+    if modo == 'vetorizado':
+        tratar_offsets_vetorizado(arquivo_entrada, arquivo_saida, thr)
+    else:
+        tratar_offsets_streaming(arquivo_entrada, arquivo_saida, thr)
+    if grafico:
+        plotar_temperaturas(arquivo_saida)
+        # Pausa o programa até que uma tecla seja pressionada no console
+        input("Pressione qualquer tecla para continuar...")
+
+def _tratar_arquivo(args):
+    arquivo_entrada, arquivo_saida, thr, modo = args
+    tratar_offsets(arquivo_entrada, arquivo_saida, thr, modo)
+    return arquivo_saida
+
+def main():
+    parser = argparse.ArgumentParser(description="Corrige picos (offsets) em logs de leitura.")
+    parser.add_argument('entradas', nargs='*', default=['dados_digitos.txt'], help="arquivos de entrada")
+    parser.add_argument('-o', '--saida', default=None,
+                        help="arquivo de saída (um só arquivo de entrada; padrão: temperaturas_corrigidas.txt)")
+    parser.add_argument('--thr', type=int, default=22, help="salto máximo aceito entre leituras")
+    parser.add_argument('--modo', choices=('streaming', 'vetorizado'), default='streaming')
+    parser.add_argument('--processos', type=int, default=None, help="processos em paralelo (vários arquivos)")
+    parser.add_argument('--grafico', action='store_true', help="mostra o gráfico e espera uma tecla (interativo)")
+    args = parser.parse_args()
+
+    if len(args.entradas) == 1:
+        saida = args.saida or 'temperaturas_corrigidas.txt'
+        tratar_offsets(args.entradas[0], saida, args.thr, args.modo, args.grafico)
+        print(f"{args.entradas[0]} -> {saida}")
+        return
+
+    # Vários arquivos: cada um vira <nome>_corrigido<ext>, processados em um pool de processos
+    tarefas = []
+    for entrada in args.entradas:
+        base, ext = os.path.splitext(entrada)
+        tarefas.append((entrada, f"{base}_corrigido{ext}", args.thr, args.modo))
+    with Pool(args.processos) as pool:
+        for (entrada, *_), saida in zip(tarefas, pool.imap(_tratar_arquivo, tarefas)):
+            print(f"{entrada} -> {saida}")
 
-arquivo_entrada = 'dados_digitos.txt'
-arquivo_saida = 'temperaturas_corrigidas.txt'
-tratar_offsets(arquivo_entrada, arquivo_saida, 22)
-#tratar_offsets(arquivo_entrada, arquivo_saida, 3)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from captura import CapturaArquivo, CapturaMemoria
+from configuracao import carregar_configuracoes
+from decodificacao import FORMAS_AMOSTRAGEM, calcular_digito, identificar_digito
+from leitor import Display, numero_do_resultado
+from processamento import tratar_imagem
+from sintetico import DisplaySintetico
+
+# ================= Benchmark / Replay =================
+# Reproduz uma gravação (diretório de imagens ou vídeo) ou frames sintéticos pelo caminho
+# captura -> tratamento -> decodificação, sem interface, e mede vazão, latência por etapa,
+# memória alocada por frame e acerto em relação aos valores esperados.
+PERCENTIS = (50, 95, 99)
+AQUECIMENTO_PADRAO = 5       # frames descartados das medidas (compilação dos templates, caches)
+FRAMES_MEMORIA_PADRAO = 50   # frames medidos com tracemalloc (em uma passada separada, que é mais lenta)
+
+# ---------- Modos de tratamento/decodificação ----------
+# Cada modo é uma lista de etapas (nome, função); cada função recebe a saída da anterior,
+# a primeira recebe o frame capturado e a última devolve o resultado (lista de "0".."9", "-", "?").
+
+def modo_legado(display, brilho, contraste):
+    """Frame inteiro tratado e um ponto por vez (calcular_digito/identificar_digito), como a interface original."""
+    def decodificar(img):
+        resultado = []
+        for dig in display.digitos:
+            template = display.templates[dig]
+            if display.ignore_digits[dig]:
+                resultado.append("-")
+            elif len(template) != 7:
+                resultado.append("?")
+            else:
+                resultado.append(str(identificar_digito(calcular_digito(img, template, display.threshold_template[dig]))))
+        return resultado
+    return [('tratamento', lambda frame: tratar_imagem(frame, brilho, contraste)), ('decodificacao', decodificar)]
+
+def modo_completo(display, brilho, contraste):
+    """Frame inteiro tratado e decodificação vetorizada."""
+    return [('tratamento', lambda frame: tratar_imagem(frame, brilho, contraste, display.desfoque)),
+            ('decodificacao', lambda img: display.decodificar(img)[0])]
+
+def modo_roi(display, brilho, contraste):
+    """Só a região dos templates tratada e decodificação vetorizada."""
+    return [('tratamento', lambda frame: display.tratar_roi(frame, brilho, contraste)),
+            ('decodificacao', lambda img: display.decodificar(img)[0])]
+
+def modo_motor(display, brilho, contraste):
+    """Caminho do motor (Display.ler): ROI + detecção de mudança; tratamento e decodificação em uma etapa."""
+    return [('leitura', lambda frame: display.ler(frame, brilho, contraste)[1])]
+
+MODOS = {
+    'legado': modo_legado,
+    'completo': modo_completo,
+    'roi': modo_roi,
+    'motor': modo_motor,
+}
+
+# ---------- Fontes de frames ----------
+def carregar_valores(arquivo):
+    """Valores esperados, um inteiro por linha na ordem dos frames ("?" ou linha vazia = sem valor)."""
+    with open(arquivo, 'r') as f:
+        return [int(linha) if linha.strip().lstrip('-').isdigit() else None for linha in f.read().splitlines()]
+
+def fonte_sintetica(n_frames, ruido, n_digitos=4):
+    """(config, frames, valores) de um display sintético; os frames ficam na memória."""
+    sintetico = DisplaySintetico(n_digitos)
+    frames, valores = sintetico.sequencia(n_frames, ruido=ruido)
+    return sintetico.config(), frames, valores
+
+def abrir_captura(gravacao, frames):
+    return CapturaMemoria(frames) if frames is not None else CapturaArquivo(gravacao)
+
+# ---------- Medição ----------
+def percentis_us(duracoes_ns):
+    if not duracoes_ns:
+        return {}
+    valores = np.percentile(np.asarray(duracoes_ns) / 1000, PERCENTIS)
+    return {f'p{p}': round(float(v), 1) for p, v in zip(PERCENTIS, valores)}
+
+def medir(config, nome_modo, gravacao=None, frames=None, valores=None, brilho=0, contraste=1.0,
+          aquecimento=AQUECIMENTO_PADRAO, frames_memoria=FRAMES_MEMORIA_PADRAO):
+    """Roda um modo sobre toda a fonte e retorna um dicionário com as medidas."""
+    display = Display(nome_modo, config)
+    etapas = MODOS[nome_modo](display, brilho, contraste)
+    duracoes = {nome: [] for nome in ('captura', *(nome for nome, _ in etapas))}
+    acertos = errados = rejeitados = comparados = n = 0
+    captura = abrir_captura(gravacao, frames)
+    inicio = None
+    try:
+        while True:
+            t_frame = time.perf_counter_ns()
+            frame = captura.capturar()
+            if frame is None:
+                break
+            tempos = [('captura', time.perf_counter_ns() - t_frame)]
+            saida = frame
+            for nome, etapa in etapas:
+                t0 = time.perf_counter_ns()
+                saida = etapa(saida)
+                tempos.append((nome, time.perf_counter_ns() - t0))
+            if n == aquecimento:
+                inicio = t_frame
+            if n >= aquecimento:
+                for nome, duracao in tempos:
+                    duracoes[nome].append(duracao)
+            numero = numero_do_resultado(saida)
+            rejeitados += numero is None
+            if valores is not None and n < len(valores) and valores[n] is not None:
+                comparados += 1
+                acertos += numero == valores[n]
+                errados += numero is not None and numero != valores[n]
+            n += 1
+    finally:
+        captura.fechar()
+    medidos = max(n - aquecimento, 0)
+    decorrido = (time.perf_counter_ns() - inicio) / 1e9 if inicio is not None else 0.0
+    return {
+        'modo': nome_modo,
+        'frames': n,
+        'frames_s': round(medidos / decorrido, 1) if decorrido > 0 else None,
+        'latencia_us': {nome: percentis_us(d) for nome, d in duracoes.items()},
+        'memoria_kb_frame': medir_memoria(config, nome_modo, gravacao, frames, brilho, contraste, frames_memoria),
+        'rejeitados': rejeitados,
+        'acuracia': round(acertos / comparados, 4) if comparados else None,
+        'errados': errados,   # leituras aceitas com valor diferente do esperado
+    }
+
+def medir_memoria(config, nome_modo, gravacao, frames, brilho, contraste, n_frames):
+    """Pico de memória alocada (KB) durante tratamento+decodificação de cada frame (mediana e máximo).
+
+    Mede o que é alocado e liberado dentro do frame (arrays temporários), não só o que fica retido.
+    """
+    if n_frames <= 0:
+        return None
+    display = Display(nome_modo, config)
+    etapas = MODOS[nome_modo](display, brilho, contraste)
+    captura = abrir_captura(gravacao, frames)
+    picos = []
+    tracemalloc.start()
+    try:
+        # O primeiro frame (compilação dos templates e buffers) não entra na conta
+        for i in range(n_frames + 1):
+            frame = captura.capturar()
+            if frame is None:
+                break
+            antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            saida = frame
+            for _, etapa in etapas:
+                saida = etapa(saida)
+            if i > 0:
+                picos.append(tracemalloc.get_traced_memory()[1] - antes)
+            del saida
+    finally:
+        tracemalloc.stop()
+        captura.fechar()
+    if not picos:
+        return None
+    return {'mediana': round(float(np.median(picos)) / 1024, 1), 'max': round(max(picos) / 1024, 1)}
+
+def imprimir_relatorio(relatorios):
+    for r in relatorios:
+        acuracia = f"{100 * r['acuracia']:.2f}%" if r['acuracia'] is not None else "-"
+        print(f"[{r['modo']}] {r['frames']} frames, {r['frames_s']} frames/s, "
+              f"rejeitados {r['rejeitados']}, errados {r['errados']}, acurácia {acuracia}")
+        for nome, p in r['latencia_us'].items():
+            if p:
+                print(f"    {nome:<14}" + "  ".join(f"{k} {v:>9.1f} us" for k, v in p.items()))
+        if r['memoria_kb_frame']:
+            m = r['memoria_kb_frame']
+            print(f"    memória/frame  mediana {m['mediana']} KB  max {m['max']} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede vazão, latência, memória e acerto do leitor sem interface.")
+    parser.add_argument('--gravacao', default=None,
+                        help="diretório de imagens ou vídeo (sem isso, usa frames sintéticos)")
+    parser.add_argument('--config', default=None,
+                        help="JSON com os templates da gravação (padrão: configuracoes.json)")
+    parser.add_argument('--valores', default=None,
+                        help="valores esperados, um por linha (padrão: valores.txt no diretório da gravação)")
+    parser.add_argument('--memoria', action='store_true',
+                        help="carrega a gravação na memória antes (tira a leitura do disco da medida)")
+    parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+    parser.add_argument('--frames', type=int, default=500, help="frames sintéticos")
+    parser.add_argument('--ruido', type=float, default=4.0, help="desvio do ruído gaussiano dos frames sintéticos")
+    parser.add_argument('--brilho', type=int, default=0)
+    parser.add_argument('--contraste', type=float, default=1.0)
+    parser.add_argument('--aquecimento', type=int, default=AQUECIMENTO_PADRAO)
+    parser.add_argument('--frames-memoria', type=int, default=FRAMES_MEMORIA_PADRAO,
+                        help="frames medidos com tracemalloc (0 desliga)")
+    parser.add_argument('--amostragem', choices=FORMAS_AMOSTRAGEM, default=None,
+                        help="máscara de cada segmento (padrão: a da configuração)")
+    parser.add_argument('--sem-desfoque', action='store_true', help="pula o blur do tratamento")
+    parser.add_argument('--json', default=None, help="grava o relatório em JSON (comparação entre versões)")
+    args = parser.parse_args()
+
+    frames = None
+    if args.gravacao is None:
+        config, frames, valores = fonte_sintetica(args.frames, args.ruido)
+        print(f"{len(frames)} frames sintéticos (ruído {args.ruido})")
+    else:
+        config = carregar_configuracoes(args.config) if args.config else carregar_configuracoes()
+        arquivo_valores = args.valores
+        if arquivo_valores is None and os.path.isdir(args.gravacao):
+            padrao = os.path.join(args.gravacao, 'valores.txt')
+            arquivo_valores = padrao if os.path.exists(padrao) else None
+        valores = carregar_valores(arquivo_valores) if arquivo_valores else None
+        if args.memoria:
+            captura = CapturaArquivo(args.gravacao)
+            frames = []
+            while (frame := captura.capturar()) is not None:
+                frames.append(frame.copy())
+            captura.fechar()
+
+    if args.amostragem or args.sem_desfoque:
+        amostragem = dict(config.get('amostragem') or {})
+        if args.amostragem:
+            amostragem['forma'] = args.amostragem
+        if args.sem_desfoque:
+            amostragem['desfoque'] = False
+        config['amostragem'] = amostragem
+
+    relatorios = [medir(config, modo, args.gravacao, frames, valores, args.brilho, args.contraste,
+                        args.aquecimento, args.frames_memoria) for modo in args.modos]
+    imprimir_relatorio(relatorios)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(relatorios, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import threading
+import time
+
+import numpy as np
+
+from decodificacao import PADROES_CANDIDATOS
+
+# ================= Calibração dos Thresholds por Segmento =================
+# Cada ponto de template ganha seu próprio threshold, a partir das luminosidades acesa e apagada
+# observadas em uma janela de frames tratados (que devem mostrar valores variados no display).
+N_FRAMES_PADRAO = 50
+METODOS = ('otsu', 'meio')
+SEPARACAO_MIN = 30.0       # diferença mínima entre as médias acesa e apagada para a calibração valer
+PERCENTIL_BORDA = 5        # borda interna de cada classe no threshold global (ignora 5% de extremos)
+AMOSTRAS_MIN_ESTADO = 3    # frames em cada estado para um ponto ganhar threshold próprio...
+FRACAO_MIN_ESTADO = 0.1    # ...e pelo menos esta fração da janela (poucas amostras fora do lugar são ruído)
+SEPARACAO_INICIAL = 120.0  # distância inicial entre as médias na adaptação online (em volta do threshold)
+ALFA_PADRAO = 0.02         # peso de cada frame na média móvel exponencial
+
+def limiar_otsu(amostras):
+    """Threshold de Otsu (0-255) para um conjunto de luminosidades; valores abaixo dele ficam na classe escura."""
+    valores = np.clip(np.asarray(amostras), 0, 255).astype(np.intp).ravel()
+    hist = np.bincount(valores, minlength=256).astype(np.float64)
+    p = hist / hist.sum()
+    w0 = np.cumsum(p)
+    mu = np.cumsum(p * np.arange(256))
+    denominador = w0 * (1 - w0)
+    validos = denominador > 1e-12
+    variancia_entre = np.zeros(256)
+    variancia_entre[validos] = (mu[-1] * w0[validos] - mu[validos]) ** 2 / denominador[validos]
+    # Entre dois grupos bem separados a variância é máxima em todo o intervalo vazio: usa o meio dele
+    melhores = np.flatnonzero(variancia_entre >= variancia_entre.max() * (1 - 1e-9))
+    return (melhores[0] + melhores[-1]) / 2 + 0.5
+
+def bordas_internas(acesas, apagadas):
+    """Limites da folga entre as classes: a borda de cima das acesas e a de baixo das apagadas.
+
+    Ignora PERCENTIL_BORDA% de extremos em cada classe. O equalizeHist espalha o ruído do fundo e a
+    classe apagada fica larga; o meio das médias (ou o Otsu) cai dentro dela, o meio da folga não.
+    """
+    return np.percentile(acesas, 100 - PERCENTIL_BORDA), np.percentile(apagadas, PERCENTIL_BORDA)
+
+class Calibrador:
+    """Acumula as luminosidades dos pontos dos templates de um display e calcula um threshold por segmento.
+
+    Primeiro separa todas as amostras em acesas/apagadas com Otsu e põe o threshold global no meio da
+    folga entre as duas classes. Cada ponto visto nos dois estados (em AMOSTRAS_MIN_ESTADO frames e
+    FRACAO_MIN_ESTADO da janela cada, com médias separadas por SEPARACAO_MIN) tem esse threshold
+    deslocado pela diferença entre o meio das suas médias acesa e apagada e o meio das médias globais;
+    as classes do ponto vêm da separação global ('meio') ou do Otsu das suas amostras ('otsu'). Os
+    demais pontos (ex.: um dígito que não mudou durante a janela) ficam no threshold global, em vez
+    de um threshold no meio do ruído de um estado só.
+    """
+
+    def __init__(self, display, n_frames=N_FRAMES_PADRAO, metodo='otsu'):
+        if metodo not in METODOS:
+            raise ValueError(f"Método de calibração desconhecido: {metodo} (opções: {', '.join(METODOS)})")
+        self.display = display
+        self.n_frames = n_frames
+        self.metodo = metodo
+        self._amostras = []
+        self._digitos = None
+
+    @property
+    def concluido(self):
+        return len(self._amostras) >= self.n_frames
+
+    def adicionar(self, frame_processado):
+        """Amostra um frame tratado; retorna True quando a janela está completa."""
+        if not self.concluido:
+            digitos, amostras = self.display.amostrar(frame_processado)
+            if digitos != self._digitos:
+                # Templates mudaram no meio da janela: recomeça
+                self._amostras, self._digitos = [], digitos
+            self._amostras.append(amostras.astype(np.float64))
+        return self.concluido
+
+    def thresholds(self):
+        """{dígito: [threshold de a..g]} calculado com as amostras acumuladas."""
+        if not self._amostras or not self._digitos:
+            raise ValueError("Nenhuma amostra de template completo para calibrar.")
+        amostras = np.stack(self._amostras)   # (frames, dígitos, 7)
+        acesos = amostras < limiar_otsu(amostras)
+        if acesos.all() or not acesos.any():
+            raise ValueError("As amostras não têm segmentos acesos e apagados para separar.")
+        media_acesa, media_apagada = amostras[acesos].mean(), amostras[~acesos].mean()
+        if media_apagada - media_acesa < SEPARACAO_MIN:
+            raise ValueError(f"Pouco contraste entre segmentos acesos e apagados "
+                             f"({media_apagada - media_acesa:.0f} < {SEPARACAO_MIN:.0f}).")
+        borda_acesa, borda_apagada = bordas_internas(amostras[acesos], amostras[~acesos])
+        n_acesos = acesos.sum(axis=0)
+        n_apagados = len(amostras) - n_acesos
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acesa = (amostras * acesos).sum(axis=0) / n_acesos
+            apagada = (amostras * ~acesos).sum(axis=0) / n_apagados
+        minimo = max(AMOSTRAS_MIN_ESTADO, FRACAO_MIN_ESTADO * len(amostras))
+        proprios = ((n_acesos >= minimo) & (n_apagados >= minimo)
+                    & (apagada - acesa >= SEPARACAO_MIN))
+        limiares = np.full(acesa.shape, (borda_acesa + borda_apagada) / 2)
+        for i, j in zip(*np.nonzero(proprios)):
+            ponto, aceso = amostras[:, i, j], acesos[:, i, j]
+            if self.metodo == 'otsu':
+                aceso = ponto < limiar_otsu(ponto)
+                if aceso.all() or not aceso.any():
+                    continue
+            # Diferença de iluminação do ponto; as médias oscilam menos que as bordas de poucas amostras
+            limiares[i, j] += (ponto[aceso].mean() + ponto[~aceso].mean() - media_acesa - media_apagada) / 2
+        # Um threshold fora da folga global cortaria uma das classes
+        np.clip(limiares, borda_acesa, borda_apagada, out=limiares)
+        return {dig: [round(float(t), 1) for t in linha] for dig, linha in zip(self._digitos, limiares)}
+
+    def aplicar(self):
+        """Grava os thresholds calculados no display e os retorna."""
+        thresholds = self.thresholds()
+        for dig, valores in thresholds.items():
+            self.display.definir_threshold(dig, valores)
+        return thresholds
+
+def calibrar_leitor(leitor, n_frames=N_FRAMES_PADRAO, metodo='otsu'):
+    """Captura `n_frames` (na cadência do leitor) e calibra todos os displays; retorna {nome: thresholds}."""
+    calibradores = [Calibrador(display, n_frames, metodo) for display in leitor.displays]
+    parar = threading.Event()
+    proximo = time.monotonic()
+    try:
+        while not all(c.concluido for c in calibradores):
+            _, frame = leitor.capturar()
+            if frame is None:
+                break
+            for calibrador in calibradores:
+                calibrador.adicionar(calibrador.display.tratar_roi(frame, leitor.brilho, leitor.contraste))
+            proximo = leitor.aguardar_cadencia(proximo, parar)
+    finally:
+        leitor.captura.fechar()
+    return {c.display.nome: c.aplicar() for c in calibradores}
+
+# ================= Adaptação Online =================
+class AdaptacaoThreshold:
+    """Acompanha mudanças de iluminação com médias móveis exponenciais por ponto.
+
+    Para cada dígito aceito, a luminosidade de cada ponto atualiza a média acesa ou a apagada,
+    conforme o padrão decodificado, e o threshold passa a ser o ponto médio entre as duas. Custa
+    algumas operações sobre arrays (dígitos x 7) por frame decodificado.
+    """
+
+    def __init__(self, alfa=ALFA_PADRAO, separacao=SEPARACAO_INICIAL):
+        self.alfa = alfa
+        self.separacao = separacao
+        self.thresholds = None
+        self._acesa = None
+        self._apagada = None
+
+    def reiniciar(self):
+        self._acesa = self._apagada = None
+
+    def vincular(self, thresholds):
+        """Passa a atualizar `thresholds` (array (N, 7) do decodificador) em lugar.
+
+        Se o número de dígitos é o mesmo, mantém o estado adaptado (ex.: templates movidos pelo tracking).
+        """
+        if self._acesa is None or self._acesa.shape != thresholds.shape:
+            self._acesa = thresholds - self.separacao / 2
+            self._apagada = thresholds + self.separacao / 2
+        else:
+            np.add(self._acesa, self._apagada, out=thresholds)
+            thresholds *= 0.5
+        self.thresholds = thresholds
+
+    def atualizar(self, amostras, valores, aceitos):
+        """amostras (N, 7), valores decodificados (N,) e aceitos (N,) bool do frame atual."""
+        acesos = PADROES_CANDIDATOS[valores]
+        peso = self.alfa * aceitos[:, None]
+        self._acesa += np.where(acesos, peso * (amostras - self._acesa), 0.0)
+        self._apagada += np.where(acesos, 0.0, peso * (amostras - self._apagada))
+        np.add(self._acesa, self._apagada, out=self.thresholds)
+        self.thresholds *= 0.5
@@ -0,0 +1,163 @@
+import os
+
+import cv2
+import numpy as np
+
+# ================= Backends de Captura =================
+# Todos os backends entregam frames BGR uint8 do tamanho da região (430x300 dividido pelo zoom).
+# O frame retornado pode ser um buffer reutilizado: só é válido até a próxima captura.
+LARGURA_BASE = 430
+ALTURA_BASE = 300
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+def regiao_captura(origem_x, origem_y, zoom):
+    return int(origem_x), int(origem_y), int(LARGURA_BASE / zoom), int(ALTURA_BASE / zoom)
+
+def capturar(origem_x, origem_y, zoom):
+    import pyautogui
+    img = np.array(pyautogui.screenshot(region=regiao_captura(origem_x, origem_y, zoom)))
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img
+
+class CapturaPyAutoGUI:
+    """Backend original: screenshot via PIL a cada frame (lento, mas sem dependências extras)."""
+
+    def capturar(self, origem_x, origem_y, zoom):
+        return capturar(origem_x, origem_y, zoom)
+
+    def fechar(self):
+        pass
+
+class CapturaMSS:
+    """Mantém a conexão com o servidor gráfico aberta (XShm no Linux) e converte direto para um buffer fixo."""
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        self._sct = None      # criado na thread que captura (handles do X11/GDI não são compartilháveis)
+        self._buffer = None
+
+    def capturar(self, origem_x, origem_y, zoom):
+        if self._sct is None:
+            self._sct = self._mss.mss()
+        x, y, w, h = regiao_captura(origem_x, origem_y, zoom)
+        shot = self._sct.grab({'left': x, 'top': y, 'width': w, 'height': h})
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4)
+        if self._buffer is None or self._buffer.shape[:2] != (h, w):
+            self._buffer = np.empty((h, w, 3), dtype=np.uint8)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._buffer)
+
+    def fechar(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+class CapturaArquivo:
+    """Reproduz um vídeo ou um diretório de imagens (ordem alfabética) como se fosse a tela.
+
+    A região de captura é ignorada: cada frame gravado já corresponde à região do display.
+    Retorna None ao fim da gravação, a menos que `repetir` seja True.
+    """
+
+    def __init__(self, caminho, repetir=False):
+        self.caminho = caminho
+        self.repetir = repetir
+        self._buffer = None
+        if os.path.isdir(caminho):
+            self._arquivos = sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                                    if nome.lower().endswith(EXTENSOES_IMAGEM))
+            self._video = None
+        else:
+            self._arquivos = None
+            self._video = cv2.VideoCapture(caminho)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Não foi possível abrir o vídeo {caminho}")
+        self._posicao = 0
+
+    def capturar(self, origem_x=None, origem_y=None, zoom=None):
+        if self._arquivos is not None:
+            if self._posicao >= len(self._arquivos):
+                if not self.repetir or not self._arquivos:
+                    return None
+                self._posicao = 0
+            frame = cv2.imread(self._arquivos[self._posicao], cv2.IMREAD_COLOR)
+            self._posicao += 1
+            return frame
+        ok, frame = self._video.read(self._buffer)
+        if not ok and self.repetir:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read(self._buffer)
+        if not ok:
+            return None
+        self._buffer = frame
+        return frame
+
+    @property
+    def total_frames(self):
+        """Número de frames da gravação (em vídeos, o valor informado pelo contêiner)."""
+        if self._arquivos is not None:
+            return len(self._arquivos)
+        return int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    @property
+    def fps(self):
+        """Taxa de quadros do vídeo; None para diretórios de imagens."""
+        if self._arquivos is not None:
+            return None
+        return self._video.get(cv2.CAP_PROP_FPS) or None
+
+    def posicionar(self, indice):
+        """Faz a próxima captura devolver o frame `indice` (usado para dividir a gravação em blocos)."""
+        if self._arquivos is not None:
+            self._posicao = indice
+        else:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, indice)
+
+    def fechar(self):
+        if self._video is not None:
+            self._video.release()
+
+class CapturaMemoria:
+    """Reproduz uma lista de frames já carregados (benchmarks e frames sintéticos, sem custo de leitura)."""
+
+    def __init__(self, frames, repetir=False):
+        self.frames = frames
+        self.repetir = repetir
+        self._posicao = 0
+
+    def capturar(self, origem_x=None, origem_y=None, zoom=None):
+        if self._posicao >= len(self.frames):
+            if not self.repetir or not self.frames:
+                return None
+            self._posicao = 0
+        frame = self.frames[self._posicao]
+        self._posicao += 1
+        return frame
+
+    def fechar(self):
+        pass
+
+BACKENDS = {
+    'pyautogui': CapturaPyAutoGUI,
+    'mss': CapturaMSS,
+    'arquivo': CapturaArquivo,
+}
+
+def criar_captura(config):
+    """Cria o backend indicado em config['captura'], por exemplo:
+
+        "captura": {"backend": "mss"}
+        "captura": {"backend": "arquivo", "caminho": "gravacao.mp4", "repetir": true}
+
+    Sem a chave, usa mss se estiver instalado e pyautogui caso contrário.
+    """
+    opcoes = dict(config.get('captura', {}))
+    backend = opcoes.pop('backend', None)
+    if backend is None:
+        try:
+            return CapturaMSS()
+        except ImportError:
+            return CapturaPyAutoGUI()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de captura desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](**opcoes)
@@ -0,0 +1,185 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+# ================= Arquivo de Configuração =================
+CONFIG_FILE = 'configuracoes.json'
+ATRASO_GRAVACAO_PADRAO = 0.5   # s sem alterações antes de gravar (agrupa eventos de slider)
+INTERVALO_OBSERVACAO_PADRAO = 1.0   # s entre verificações do arquivo na recarga automática
+
+def carregar_configuracoes(arquivo=CONFIG_FILE):
+    """Lê o arquivo JSON de configuração; se não existir, retorna um dicionário vazio."""
+    try:
+        with open(arquivo, 'r') as f:
+            config = json.load(f)
+            print("Configurações carregadas.")
+            return config
+    except (FileNotFoundError, json.JSONDecodeError):
+        print("Arquivo de configuração não encontrado. Usando valores padrão.")
+        return {}
+
+def gravar_json_atomico(config, arquivo):
+    """Grava em um arquivo temporário no mesmo diretório e troca pelo definitivo (nunca fica meio escrito)."""
+    diretorio = os.path.dirname(os.path.abspath(arquivo))
+    fd, temporario = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=diretorio)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(config, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, arquivo)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+def salvar_configuracoes(config, arquivo=CONFIG_FILE):
+    """Grava o dicionário de configuração no arquivo JSON."""
+    gravar_json_atomico(config, arquivo)
+    print("Configurações salvas.")
+
+def _assinatura(arquivo):
+    try:
+        estado = os.stat(arquivo)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+# ================= Configuração em Memória =================
+class Configuracao:
+    """Configuração em memória com versões, gravação atrasada em segundo plano e recarga do arquivo.
+
+    Cada `atualizar` cria um novo snapshot imutável (versão, dicionário); quem lê pega o par inteiro
+    de uma vez com `snapshot()`, então nunca vê uma configuração pela metade. A gravação no disco
+    acontece numa thread própria, `atraso` segundos depois da última alteração, com troca atômica
+    do arquivo. Com `observar=True`, alterações feitas no arquivo por outro programa (editor,
+    outra instância) viram uma nova versão.
+
+    `validar(config)`, se definido, é chamado antes de publicar uma configuração recarregada do
+    arquivo; se levantar ValueError, a recarga é descartada e a versão atual continua valendo.
+    """
+
+    def __init__(self, arquivo=CONFIG_FILE, atraso=ATRASO_GRAVACAO_PADRAO, observar=False,
+                 intervalo_observacao=INTERVALO_OBSERVACAO_PADRAO, validar=None):
+        self.arquivo = arquivo
+        self.atraso = atraso
+        self.validar = validar
+        self._snapshot = (0, carregar_configuracoes(arquivo))
+        self._assinatura = _assinatura(arquivo)   # do arquivo como foi lido/gravado por nós
+        self._cond = threading.Condition()
+        self._pendente = None    # versão ainda não gravada
+        self._prazo = 0.0
+        self._fechada = False
+        self._thread_gravacao = threading.Thread(target=self._gravar_atrasado, name="Config-gravacao", daemon=True)
+        self._thread_gravacao.start()
+        self._thread_observacao = None
+        if observar:
+            self._thread_observacao = threading.Thread(
+                target=self._observar, args=(intervalo_observacao,), name="Config-observacao", daemon=True)
+            self._thread_observacao.start()
+
+    # ---------- Leitura ----------
+    def snapshot(self):
+        """(versão, config) da configuração atual; o dicionário não deve ser modificado."""
+        return self._snapshot
+
+    @property
+    def versao(self):
+        return self._snapshot[0]
+
+    @property
+    def config(self):
+        return self._snapshot[1]
+
+    # ---------- Alteração ----------
+    def atualizar(self, config, gravar=True):
+        """Publica uma nova versão (cópia de `config`) e agenda a gravação; retorna o número da versão."""
+        with self._cond:
+            versao = self._snapshot[0] + 1
+            self._snapshot = (versao, copy.deepcopy(config))
+            if gravar:
+                self._pendente = versao
+                self._prazo = time.monotonic() + self.atraso
+                self._cond.notify_all()
+        return versao
+
+    def descarregar(self):
+        """Grava agora a versão pendente, se houver."""
+        with self._cond:
+            if self._pendente is None:
+                return
+            versao, config = self._snapshot
+        # Fora do lock: quem publica uma nova versão não espera pelo disco (o snapshot é imutável)
+        gravar_json_atomico(config, self.arquivo)
+        with self._cond:
+            self._assinatura = _assinatura(self.arquivo)
+            if self._pendente == versao:
+                self._pendente = None
+
+    def recarregar(self):
+        """Lê o arquivo de novo se ele mudou desde a última leitura/gravação; retorna True se mudou."""
+        assinatura = _assinatura(self.arquivo)
+        if assinatura is None or assinatura == self._assinatura:
+            return False
+        try:
+            with open(self.arquivo, 'r') as f:
+                config = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False   # arquivo sendo escrito por outro programa: tenta na próxima verificação
+        if self.validar is not None:
+            try:
+                self.validar(config)
+            except ValueError as erro:
+                # Não tenta de novo até o arquivo mudar outra vez
+                self._assinatura = assinatura
+                print(f"Configuração de {self.arquivo} ignorada: {erro}")
+                return False
+        with self._cond:
+            if self._pendente is not None:
+                return False   # há alterações nossas ainda não gravadas; elas prevalecem
+            self._assinatura = assinatura
+            self._snapshot = (self._snapshot[0] + 1, config)
+        print("Configurações recarregadas do arquivo.")
+        return True
+
+    # ---------- Threads ----------
+    def _gravar_atrasado(self):
+        while True:
+            with self._cond:
+                if self._fechada:
+                    return
+                if self._pendente is None:
+                    self._cond.wait()
+                    continue
+                espera = self._prazo - time.monotonic()
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+            try:
+                self.descarregar()
+            except OSError as erro:
+                print(f"Erro ao gravar {self.arquivo}: {erro}")
+                with self._cond:
+                    self._prazo = time.monotonic() + self.atraso
+
+    def _observar(self, intervalo):
+        while True:
+            with self._cond:
+                if self._fechada:
+                    return
+                self._cond.wait(intervalo)
+                if self._fechada:
+                    return
+            self.recarregar()
+
+    def fechar(self):
+        """Grava o que estiver pendente e encerra as threads."""
+        with self._cond:
+            self._fechada = True
+            self._cond.notify_all()
+        self._thread_gravacao.join()
+        if self._thread_observacao is not None:
+            self._thread_observacao.join()
+        self.descarregar()
@@ -0,0 +1,244 @@
+import numpy as np
+
+# ================= Decodificação de 7 Segmentos =================
+# Ordem dos segmentos em cada template: (a,b,c,d,e,f,g); "a" é o bit mais significativo do código
+N_SEGMENTOS = 7
+PESOS_SEGMENTOS = 1 << np.arange(N_SEGMENTOS - 1, -1, -1)
+CODIGO_AUSENTE = 0xFF   # dígito não amostrado (ignorado ou template incompleto); códigos válidos vão até 127
+
+MAPA_DIGITOS = {
+    '1111110': 0, '0110000': 1, '1101101': 2,
+    '1111001': 3, '0110011': 4, '1011011': 5,
+    '1011111': 6, '1110000': 7, '1111111': 8,
+    '1111011': 9,
+}
+
+# ---------- Decodificação por distância ----------
+# Além dos dígitos, a decodificação por distância reconhece o sinal de menos (só "g") e o dígito apagado
+VALOR_MENOS = 10
+VALOR_APAGADO = 11
+SIMBOLO_MENOS = "\u2212"   # "−" no resultado (não confundir com "-" de dígito ignorado)
+SIMBOLO_APAGADO = " "
+PADROES_CANDIDATOS = np.array(
+    [[c == '1' for c in padrao] for padrao in MAPA_DIGITOS] + [[False] * 6 + [True], [False] * N_SEGMENTOS])
+VALORES_CANDIDATOS = np.array(list(MAPA_DIGITOS.values()) + [VALOR_MENOS, VALOR_APAGADO])
+# Diferença (níveis de cinza) entre a luminosidade e o threshold a partir da qual o segmento conta como certo
+MARGEM_CHEIA = 20.0
+CONFIANCA_DIGITO_MIN = 0.25   # confiança mínima padrão para aceitar um dígito
+
+def calcular_luminosidade_ponto(img, ponto):
+    h, w = img.shape[:2]
+    x, y = int(ponto[0]), int(ponto[1])
+    if 0 <= x < w and 0 <= y < h:
+        return np.mean(img[y, x]) if len(img.shape)==3 else img[y, x]
+    return 0
+
+def identificar_digito(segmentos_str):
+    return MAPA_DIGITOS.get(segmentos_str, '?')
+
+def calcular_digito(img, template, threshold):
+    # threshold escalar ou um por segmento (lista a..g, e ponto decimal, gravada pela calibração)
+    limiares = limiares_do_template(threshold)
+    ativos = []
+    for ponto, limiar in zip(template, limiares):
+        lum = calcular_luminosidade_ponto(img, ponto)
+        ativos.append(lum < limiar)
+    return ''.join(['1' if a else '0' for a in ativos])
+
+def compilar_indices(templates, forma, n_pontos=N_SEGMENTOS):
+    """Converte N templates de `n_pontos` pontos em índices lineares (N, n_pontos) para img.ravel().
+
+    Pontos fora da imagem ficam marcados como inválidos e leem luminosidade 0,
+    como em `calcular_luminosidade_ponto`.
+    """
+    h, w = forma[:2]
+    pontos = np.asarray(templates, dtype=np.float64).reshape(-1, n_pontos, 2)
+    xs = pontos[..., 0].astype(np.intp)
+    ys = pontos[..., 1].astype(np.intp)
+    validos = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    indices = np.where(validos, ys * w + xs, 0)
+    return indices, validos
+
+def amostrar(img, indices, validos):
+    """Lê todos os pontos de todos os dígitos em uma única indexação."""
+    amostras = img.reshape(-1)[indices]
+    return np.where(validos, amostras, 0)
+
+# ---------- Máscaras de amostragem ----------
+# Em vez de um pixel por segmento, cada segmento pode ser lido como a média de várias amostras
+# sub-pixel (interpolação bilinear) ao longo dele ('linha') ou num retângulo orientado ('retangulo').
+FORMAS_AMOSTRAGEM = ('ponto', 'linha', 'retangulo')
+COMPRIMENTO_PADRAO = 0.5   # fração do vão do segmento coberta ao longo dele
+LARGURA_PADRAO = 0.1       # fração da largura do dígito coberta na transversal (só 'retangulo')
+AMOSTRAS_MAX = 16          # amostras por eixo do retângulo
+
+# Direção (e vão) de cada segmento como combinação dos pontos do template (a,b,c,d,e,f,g):
+# a: f->b, b e f: g->a, c e e: d->g, d: e->c, g: média de f->b e e->c
+EIXOS_SEGMENTOS = np.array([
+    [0, 1, 0, 0, 0, -1, 0],
+    [1, 0, 0, 0, 0, 0, -1],
+    [0, 0, 0, -1, 0, 0, 1],
+    [0, 0, 1, 0, -1, 0, 0],
+    [0, 0, 0, -1, 0, 0, 1],
+    [1, 0, 0, 0, 0, 0, -1],
+    [0, 0.5, 0.5, 0, -0.5, -0.5, 0],
+])
+
+def parametros_amostragem(config):
+    """(forma, comprimento, largura) a partir de um dicionário "amostragem" (None = um pixel por segmento)."""
+    config = config or {}
+    forma = config.get('forma', 'ponto')
+    if forma not in FORMAS_AMOSTRAGEM:
+        raise ValueError(f"Forma de amostragem desconhecida: {forma} (opções: {', '.join(FORMAS_AMOSTRAGEM)})")
+    return forma, config.get('comprimento', COMPRIMENTO_PADRAO), config.get('largura', LARGURA_PADRAO)
+
+def compilar_mascaras(templates, forma, forma_amostragem='linha', comprimento=COMPRIMENTO_PADRAO,
+                      largura=LARGURA_PADRAO):
+    """Máscaras de amostragem de N templates de 7 pontos: (indices, pesos), ambos (N, 7, K), para img.ravel().
+
+    Cada segmento vira K índices de pixel com pesos que somam 1 (interpolação bilinear das amostras
+    ao longo do segmento e, no 'retangulo', na transversal). Pixels fora da imagem têm peso 0; um
+    segmento inteiramente fora lê 0, como em `calcular_luminosidade_ponto`.
+    """
+    h, w = forma[:2]
+    pontos = np.asarray(templates, dtype=np.float64).reshape(-1, N_SEGMENTOS, 2)
+    eixos = np.einsum('sk,nkd->nsd', EIXOS_SEGMENTOS, pontos)               # (N, 7, 2)
+    vaos = np.linalg.norm(eixos, axis=2, keepdims=True)
+    direcoes = np.divide(eixos, vaos, out=np.zeros_like(eixos), where=vaos > 0)
+    normais = np.stack([-direcoes[..., 1], direcoes[..., 0]], axis=-1)
+    largura_digito = np.linalg.norm(pontos[:, 1] - pontos[:, 5], axis=1)[:, None, None]   # |b - f|
+    ao_longo = comprimento * vaos                                            # (N, 7, 1) em pixels
+    transversal = (largura * largura_digito if forma_amostragem == 'retangulo' else np.zeros_like(largura_digito))
+    n_longo = int(np.clip(np.ceil(ao_longo.max(initial=0)) + 1, 2, AMOSTRAS_MAX))
+    n_transversal = int(np.clip(np.ceil(transversal.max(initial=0)) + 1, 1, AMOSTRAS_MAX))
+    t = np.linspace(-0.5, 0.5, n_longo)
+    s = np.linspace(-0.5, 0.5, n_transversal) if n_transversal > 1 else np.zeros(1)
+    t, s = np.meshgrid(t, s, indexing='ij')
+    t, s = t.ravel(), s.ravel()
+    # Coordenadas das amostras (N, 7, n_longo * n_transversal, 2); centros dos pixels nas coordenadas inteiras
+    coords = (pontos[:, :, None, :] + (t * ao_longo)[..., None] * direcoes[:, :, None, :]
+              + (s * transversal)[..., None] * normais[:, :, None, :])
+    x0 = np.floor(coords[..., 0])
+    y0 = np.floor(coords[..., 1])
+    fx = coords[..., 0] - x0
+    fy = coords[..., 1] - y0
+    vizinhos_x = np.stack([x0, x0 + 1, x0, x0 + 1], axis=-1).astype(np.intp)
+    vizinhos_y = np.stack([y0, y0, y0 + 1, y0 + 1], axis=-1).astype(np.intp)
+    pesos = np.stack([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy], axis=-1)
+    validos = (vizinhos_x >= 0) & (vizinhos_x < w) & (vizinhos_y >= 0) & (vizinhos_y < h)
+    pesos = np.where(validos, pesos, 0.0).reshape(*pesos.shape[:2], -1)
+    indices = np.where(validos, vizinhos_y * w + vizinhos_x, 0).reshape(pesos.shape)
+    total = pesos.sum(axis=2, keepdims=True)
+    np.divide(pesos, total, out=pesos, where=total > 0)
+    return indices, pesos
+
+def amostrar_mascaras(img, indices, pesos):
+    """Média ponderada das máscaras de todos os segmentos em uma única indexação: (N, 7)."""
+    return (img.reshape(-1)[indices] * pesos).sum(axis=2)
+
+def codificar_segmentos(amostras, thresholds):
+    """Segmento aceso (luminosidade < threshold) vira bit; retorna um código de 7 bits por dígito.
+
+    `thresholds` pode ser escalar, um valor por dígito (N, 1) ou um por segmento (N, 7).
+    """
+    ativos = amostras < thresholds
+    return ativos.astype(np.intp) @ PESOS_SEGMENTOS
+
+def simbolo_valor(valor):
+    """Texto de um valor decodificado no resultado ("0".."9", SIMBOLO_MENOS ou SIMBOLO_APAGADO)."""
+    if valor == VALOR_MENOS:
+        return SIMBOLO_MENOS
+    if valor == VALOR_APAGADO:
+        return SIMBOLO_APAGADO
+    return str(valor)
+
+def pesos_segmentos(amostras, thresholds):
+    """Certeza de cada segmento (0 a 1): distância da luminosidade ao threshold, saturada em MARGEM_CHEIA."""
+    return np.minimum(np.abs(amostras - thresholds) / MARGEM_CHEIA, 1.0)
+
+def decodificar_por_distancia(ativos, pesos):
+    """Padrão candidato mais próximo de cada dígito pela distância de Hamming ponderada pelos pesos.
+
+    `ativos` e `pesos` têm forma (N, 7). Retorna (valores, confiancas): a confiança é a diferença entre
+    a distância do segundo candidato mais próximo e a do escolhido, limitada a 1 (1 = separado do
+    vizinho por pelo menos um segmento inteiramente certo; 0 = empate).
+    """
+    diferentes = ativos[:, None, :] != PADROES_CANDIDATOS[None, :, :]
+    distancias = (diferentes * pesos[:, None, :]).sum(axis=2)
+    dois_menores = np.partition(distancias, 1, axis=1)
+    valores = VALORES_CANDIDATOS[np.argmin(distancias, axis=1)]
+    return valores, np.minimum(dois_menores[:, 1] - dois_menores[:, 0], 1.0)
+
+def limiares_do_template(threshold):
+    """Threshold de um template como 8 valores (a..g e ponto decimal): aceita escalar, 7 ou 8 valores.
+
+    Sem threshold próprio, o ponto decimal usa a média dos segmentos do dígito.
+    """
+    valores = np.asarray(threshold, dtype=np.float64).ravel()
+    if valores.size == 1:
+        return np.repeat(valores, N_SEGMENTOS + 1)
+    if valores.size == N_SEGMENTOS:
+        return np.append(valores, valores.mean())
+    return valores
+
+class DecodificadorDigitos:
+    """Templates pré-compilados para uma forma de imagem; decodifica N dígitos por chamada.
+
+    Cada template tem 7 pontos (a..g) e, opcionalmente, um 8º ponto para o ponto decimal.
+    `amostragem` ({"forma": "linha", "comprimento": 0.5, "largura": 0.1}) troca o pixel de cada
+    segmento por uma máscara de amostras sub-pixel; o ponto decimal continua lido em um pixel.
+    Deve ser recriado quando os templates ou a forma do frame mudarem.
+    """
+
+    def __init__(self, templates, thresholds, forma, amostragem=None):
+        self.forma = tuple(forma[:2])
+        segmentos = [t[:N_SEGMENTOS] for t in templates]
+        self.indices, self.validos = compilar_indices(segmentos, forma)
+        self.forma_amostragem, comprimento, largura = parametros_amostragem(amostragem)
+        self.mascaras = None
+        if self.forma_amostragem != 'ponto' and segmentos:
+            self.mascaras = compilar_mascaras(segmentos, forma, self.forma_amostragem, comprimento, largura)
+        n = len(self.indices)
+        if np.ndim(thresholds) == 0:
+            thresholds = [thresholds] * n
+        # Uma linha (a..g, ponto decimal) por template; as linhas podem ser alteradas em lugar (adaptação)
+        limiares = np.array([limiares_do_template(t) for t in thresholds]).reshape(n, N_SEGMENTOS + 1)
+        self.thresholds = limiares[:, :N_SEGMENTOS]
+        self.threshold_ponto = limiares[:, N_SEGMENTOS]
+        # Templates sem o 8º ponto recebem um ponto fora da imagem, que fica marcado como inválido
+        pontos = [t[N_SEGMENTOS] if len(t) > N_SEGMENTOS else (-1, -1) for t in templates]
+        indices_ponto, validos_ponto = compilar_indices(pontos, forma, n_pontos=1)
+        self.indices_ponto, self.validos_ponto = indices_ponto[:, 0], validos_ponto[:, 0]
+
+    def regiao_amostrada(self):
+        """Pontos (x, y) dos cantos da área lida pelas máscaras (para a região do tratamento ROI)."""
+        if self.mascaras is None:
+            return []
+        indices, pesos = self.mascaras
+        usados = indices[pesos > 0]
+        if usados.size == 0:
+            return []
+        ys, xs = np.divmod(usados, self.forma[1])
+        return [(int(xs.min()), int(ys.min())), (int(xs.max()), int(ys.max()))]
+
+    def amostrar(self, img):
+        """Luminosidades (N, 7) dos segmentos: um pixel por segmento ou a média das máscaras."""
+        if self.mascaras is not None:
+            return amostrar_mascaras(img, *self.mascaras)
+        return amostrar(img, self.indices, self.validos)
+
+    def com_confianca(self, img):
+        """Retorna (códigos, valores, confiancas, pontos) com a decodificação por distância.
+
+        valores vão de 0 a 9, ou VALOR_MENOS/VALOR_APAGADO; pontos indica o ponto decimal aceso
+        (sempre False em templates sem o 8º ponto).
+        """
+        amostras = self.amostrar(img)
+        self.amostras = amostras   # luminosidades do último frame (adaptação dos thresholds e preview)
+        codigos = codificar_segmentos(amostras, self.thresholds)
+        ativos = amostras < self.thresholds
+        valores, confiancas = decodificar_por_distancia(ativos, pesos_segmentos(amostras, self.thresholds))
+        # Luminosidade do ponto decimal (0 sem o 8º ponto), guardada como as amostras dos segmentos
+        self.amostras_ponto = np.where(self.validos_ponto, img.reshape(-1)[self.indices_ponto], 0)
+        pontos = self.validos_ponto & (self.amostras_ponto < self.threshold_ponto)
+        return codigos, valores, confiancas, pontos
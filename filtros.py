@@ -0,0 +1,94 @@
+from bisect import bisect_left, insort
+from collections import Counter, deque
+
+from Trata import CorretorOffsets
+
+# ================= Filtros Online =================
+# Cada filtro recebe um valor por leitura válida e devolve o valor filtrado, com custo constante
+# por amostra (proporcional só ao tamanho fixo da janela). Leituras inválidas (None) passam direto
+# sem alterar o estado.
+
+class FiltroOffsets:
+    """Mesma regra do Trata.py: salto maior que `thr` vira a média dos dois anteriores corrigidos."""
+
+    def __init__(self, thr=22):
+        self._corretor = CorretorOffsets(thr)
+
+    def filtrar(self, valor):
+        if valor is None:
+            return None
+        return self._corretor.corrigir(valor)
+
+class FiltroMediana:
+    """Mediana das últimas `k` leituras (janela ordenada mantida com bisect)."""
+
+    def __init__(self, k=5):
+        self.k = k
+        self._janela = deque()
+        self._ordenada = []
+
+    def filtrar(self, valor):
+        if valor is None:
+            return None
+        self._janela.append(valor)
+        insort(self._ordenada, valor)
+        if len(self._janela) > self.k:
+            antigo = self._janela.popleft()
+            del self._ordenada[bisect_left(self._ordenada, antigo)]
+        return self._ordenada[(len(self._ordenada) - 1) // 2]
+
+class FiltroMaioria:
+    """Só muda a saída quando um valor aparece em mais da metade das últimas `k` leituras."""
+
+    def __init__(self, k=5):
+        self.k = k
+        self._janela = deque()
+        self._contagem = Counter()
+        self._saida = None
+
+    def filtrar(self, valor):
+        if valor is None:
+            return None
+        self._janela.append(valor)
+        self._contagem[valor] += 1
+        if len(self._janela) > self.k:
+            antigo = self._janela.popleft()
+            self._contagem[antigo] -= 1
+            if not self._contagem[antigo]:
+                del self._contagem[antigo]
+        # O valor recém-chegado é o único que pode ter acabado de ganhar a maioria
+        if self._saida is None or self._contagem[valor] * 2 > len(self._janela):
+            self._saida = valor
+        return self._saida
+
+class FiltroCadeia:
+    """Aplica vários filtros em sequência."""
+
+    def __init__(self, filtros):
+        self.filtros = filtros
+
+    def filtrar(self, valor):
+        for filtro in self.filtros:
+            valor = filtro.filtrar(valor)
+        return valor
+
+FILTROS = {
+    'offsets': FiltroOffsets,
+    'mediana': FiltroMediana,
+    'maioria': FiltroMaioria,
+}
+
+def criar_filtro(config):
+    """Cria o filtro descrito no JSON, por exemplo {"tipo": "mediana", "k": 5}, ou uma lista deles.
+
+    Retorna None quando não há filtro configurado.
+    """
+    if not config:
+        return None
+    if isinstance(config, list):
+        return FiltroCadeia([criar_filtro(c) for c in config])
+    opcoes = dict(config)
+    tipo = opcoes.pop('tipo')
+    if tipo not in FILTROS:
+        raise ValueError(f"Filtro desconhecido: {tipo} (opções: {', '.join(FILTROS)})")
+    return FILTROS[tipo](**opcoes)
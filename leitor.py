@@ -0,0 +1,616 @@
+import argparse
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from calibracao import METODOS, AdaptacaoThreshold, calibrar_leitor
+from captura import ALTURA_BASE, LARGURA_BASE, criar_captura
+from configuracao import CONFIG_FILE, Configuracao
+from decodificacao import (CODIGO_AUSENTE, CONFIANCA_DIGITO_MIN, SIMBOLO_APAGADO, SIMBOLO_MENOS, DecodificadorDigitos,
+                           simbolo_valor)
+from filtros import criar_filtro
+from metricas import Metricas, iniciar_saidas
+from pipeline import BLOQUEAR, DESCARTAR_ANTIGO, POLITICAS, PipelineLeitura
+from processamento import LIMIAR_MUDANCA_PADRAO, DetectorMudanca, ProcessadorROI, tratar_imagem
+from rastreamento import Rastreador
+from registro import (MAX_ARQUIVOS_PADRAO, MAX_MB_PADRAO, RegistroBinario, RegistroPorDisplay, RegistroRLE, RegistroTexto,
+                      arquivo_do_display, formatar_tempo, parametros_rotacao)
+
+# ================= Configurações =================
+DIGITOS = ("0", "1", "2", "3")  # dígitos padrão quando a configuração não define mais templates
+DISPLAY_PADRAO = "display"      # nome do display único no formato antigo (templates no nível raiz)
+
+# Valores padrão usados quando o JSON não define a região de captura
+ORIGEM_X_PADRAO = 1429
+ORIGEM_Y_PADRAO = 511
+ZOOM_PADRAO = 0.972
+
+def digitos_da_config(config):
+    """Nomes dos dígitos ("0".."N-1") a partir das chaves template_dK presentes no JSON (mínimo 4)."""
+    indices = [int(chave[len('template_d'):]) for chave in config
+               if chave.startswith('template_d') and chave[len('template_d'):].isdigit()]
+    n = max([len(DIGITOS)] + [i + 1 for i in indices])
+    return tuple(str(i) for i in range(n))
+
+# ================= Funções Auxiliares =================
+def exportar_dados_para_txt(tempos, digitos_por_tempo, nome_arquivo="dados_digitos.txt"):
+    with open(nome_arquivo, "w") as arquivo:
+        for tempo, digito in zip(tempos, digitos_por_tempo):
+            arquivo.write(f"{formatar_tempo(tempo.total_seconds())}, {digito}\n")
+    print(f"Dados exportados para {nome_arquivo} com sucesso.")
+
+def numero_do_resultado(resultado):
+    """Concatena os dígitos lidos (com o sinal de menos, se houver); None se a leitura não formar um número.
+
+    Dígitos ignorados ("-") e o ponto decimal não entram no número. Dígitos apagados só valem à
+    esquerda (zeros não exibidos) e o sinal de menos só antes do primeiro algarismo; qualquer
+    outra combinação, "?" ou nenhum algarismo é rejeitada.
+    """
+    simbolos = [d.rstrip(".") for d in resultado if d != "-"]
+    i = 0
+    while i < len(simbolos) and simbolos[i] == SIMBOLO_APAGADO:
+        i += 1
+    negativo = i < len(simbolos) and simbolos[i] == SIMBOLO_MENOS
+    algarismos = simbolos[i + negativo:]
+    if not algarismos or not all(d.isdigit() for d in algarismos):
+        return None
+    numero = int("".join(algarismos))
+    return -numero if negativo else numero
+
+# ================= Displays (Instrumentos) =================
+class Display:
+    """Um instrumento na tela: templates dos dígitos, thresholds, dígitos ignorados e tracking próprios.
+
+    Configuração no JSON (dentro de "displays", ou no nível raiz para um único display):
+        {"template_d0": [[x, y], ...], ..., "threshold_template": {"0": 100, "1": [t_a, ..., t_g]},
+         "ignore_digits": {"0": false}, "adaptar_threshold": 0.02,
+         "tracking_bbox": [x, y, w, h], "tracking": {"janela": 24, "confianca_min": 0.6},
+         "filtro": {"tipo": "mediana", "k": 5}, "confianca_min": 0.25,
+         "amostragem": {"forma": "linha", "comprimento": 0.5, "largura": 0.1, "desfoque": false}}
+    """
+
+    def __init__(self, nome, config=None, filtro_padrao=None, limiar_mudanca=LIMIAR_MUDANCA_PADRAO,
+                 tracking_padrao=None, confianca_padrao=CONFIANCA_DIGITO_MIN, adaptacao_padrao=None,
+                 amostragem_padrao=None):
+        config = config or {}
+        self.nome = nome
+        # Máscara de cada segmento (ponto, linha ou retângulo) e se o tratamento usa o blur; ver decodificacao.py
+        self.amostragem = config.get('amostragem', amostragem_padrao)
+        # Dígitos decodificados com confiança abaixo disso viram "?" e a leitura é rejeitada
+        self.confianca_min = config.get('confianca_min', confianca_padrao)
+        # Com limiar_mudanca (None desliga), frames em que a região do display não mudou reaproveitam a última leitura
+        self.limiar_mudanca = limiar_mudanca
+        self._detector = None
+        self._lidos = None            # última decodificação: dígito -> (código, valor, confiança, ponto)
+        self.luminosidades = {}       # dígito -> luminosidades comparadas com os thresholds na última decodificação
+        self._ultimo_processado = None
+        self._parametros = None       # (brilho, contraste) da última decodificação
+        self.metricas = None          # Metricas do leitor (tempos de tratamento/decodificação), se houver
+        # Filtro online aplicado ao número lido (ver filtros.py); cada display tem seu próprio estado
+        self.filtro_config = config.get('filtro', filtro_padrao)
+        self.filtro = criar_filtro(self.filtro_config)
+        self.digitos = digitos_da_config(config)
+        self.templates = {dig: [] for dig in self.digitos}
+        # Um threshold por dígito ou uma lista com um por segmento (a..g), como grava a calibração
+        self.threshold_template = {dig: 100 for dig in self.digitos}
+        self.threshold_template.update(config.get('threshold_template', {}))
+        # Com "adaptar_threshold" (alfa da média móvel), os thresholds acompanham a iluminação a cada frame
+        self.adaptar_threshold = config.get('adaptar_threshold', adaptacao_padrao)
+        self._adaptacao = AdaptacaoThreshold(self.adaptar_threshold) if self.adaptar_threshold else None
+        self.ignore_digits = {dig: False for dig in self.digitos}
+        self.ignore_digits.update(config.get('ignore_digits', {}))
+        self._decodificador = None
+        self._processador = None
+        # (forma do frame, geração) para a qual decodificador/processador foram montados; cada alteração
+        # de templates/thresholds gera uma nova geração (pode vir da thread da interface durante a compilação)
+        self._geracoes = itertools.count(1)
+        self._geracao = 0
+        self._compilado_para = None
+        self.aplicar_templates(config)
+
+        self.tracking_ativo = False
+        bbox = config.get('tracking_bbox')
+        self.tracking_bbox = tuple(bbox) if bbox else None   # [x, y, w, h]
+        # Parâmetros do Rastreador (janela, niveis, confianca_min, atualizacao)
+        self.tracking_config = dict(config.get('tracking', tracking_padrao or {}))
+        self._rastreador = None
+
+    # ---------- Configuração ----------
+    def aplicar_templates(self, config):
+        for dig in self.digitos:
+            self.templates[dig] = [tuple(p) for p in config.get(f'template_d{dig}', [])]
+        self._invalidar_decodificador()
+
+    def aplicar_config(self, config):
+        """Troca templates, thresholds, dígitos ignorados, confiança mínima e amostragem pelos de `config` (recarga)."""
+        self.amostragem = config.get('amostragem', self.amostragem)
+        self.aplicar_templates(config)
+        self.threshold_template = {dig: 100 for dig in self.digitos}
+        self.threshold_template.update(config.get('threshold_template', {}))
+        self.ignore_digits = {dig: False for dig in self.digitos}
+        self.ignore_digits.update(config.get('ignore_digits', {}))
+        self.confianca_min = config.get('confianca_min', self.confianca_min)
+        if self._adaptacao is not None:
+            self._adaptacao.reiniciar()
+
+    def definir_template(self, dig, pontos):
+        self.templates[dig] = [tuple(p) for p in pontos]
+        self._invalidar_decodificador()
+
+    def definir_threshold(self, dig, valor):
+        self.threshold_template[dig] = valor
+        if self._adaptacao is not None:
+            self._adaptacao.reiniciar()
+        self._invalidar_decodificador()
+
+    def config(self):
+        config = {f'template_d{dig}': [list(p) for p in self.templates[dig]] for dig in self.digitos}
+        config['threshold_template'] = dict(self.threshold_template)
+        config['ignore_digits'] = dict(self.ignore_digits)
+        if self.tracking_bbox is not None:
+            config['tracking_bbox'] = list(self.tracking_bbox)
+        if self.tracking_config:
+            config['tracking'] = self.tracking_config
+        if self.filtro_config is not None:
+            config['filtro'] = self.filtro_config
+        config['confianca_min'] = self.confianca_min
+        if self.adaptar_threshold:
+            config['adaptar_threshold'] = self.adaptar_threshold
+        if self.amostragem is not None:
+            config['amostragem'] = self.amostragem
+        return config
+
+    def filtrar(self, numero):
+        return self.filtro.filtrar(numero) if self.filtro is not None else numero
+
+    # ---------- Tracking ----------
+    def ativar_tracking(self, frame):
+        """Fixa a referência do tracking no frame (BGR) atual e guarda a posição base dos templates."""
+        if self.tracking_bbox is None:
+            # Se a região de tracking não foi definida, usa o centro do frame
+            h, w = frame.shape[:2]
+            self.tracking_bbox = (w//4, h//4, w//2, h//2)
+        self._rastreador = Rastreador(frame, self.tracking_bbox, **self.tracking_config)
+        # Os templates são sempre recalculados a partir da base + deslocamento total (sem acumular erro)
+        self._templates_base = {dig: list(t) for dig, t in self.templates.items()}
+        self._posicao_base = self._rastreador.posicao
+        self.tracking_ativo = True
+
+    def desativar_tracking(self):
+        self.tracking_ativo = False
+        self._rastreador = None
+
+    def rastrear(self, frame):
+        if not self.tracking_ativo or self._rastreador is None:
+            return
+        posicao_anterior = self._rastreador.posicao
+        posicao = self._rastreador.atualizar(frame)
+        if posicao is None or posicao == posicao_anterior:
+            # Correspondência rejeitada (baixa confiança) ou display parado: templates ficam onde estão
+            return
+        self.tracking_bbox = self._rastreador.bbox
+        dx = posicao[0] - self._posicao_base[0]
+        dy = posicao[1] - self._posicao_base[1]
+        for dig, template in self._templates_base.items():
+            if template:
+                self.templates[dig] = [(p[0] + dx, p[1] + dy) for p in template]
+        self._invalidar_decodificador()
+
+    # ---------- Tratamento e Decodificação ----------
+    def _invalidar_decodificador(self):
+        self._geracao = next(self._geracoes)
+
+    @property
+    def desfoque(self):
+        """Blur 5x5 no tratamento; pode ser desligado quando os segmentos são lidos por área."""
+        return (self.amostragem or {}).get('desfoque', True)
+
+    def _preparar(self, forma):
+        # Recompila só quando templates, thresholds, amostragem ou o tamanho do frame (zoom) mudam;
+        # o tracking também recompila, porque desloca os templates
+        forma = tuple(forma[:2])
+        geracao = self._geracao   # lida antes dos templates: uma alteração durante a compilação não se perde
+        if self._compilado_para == (forma, geracao):
+            return
+        # 7 pontos (a..g) ou 8, com o ponto decimal
+        self._completos = [dig for dig in self.digitos if len(self.templates[dig]) in (7, 8)]
+        templates = [self.templates[dig] for dig in self._completos]
+        self._decodificador = DecodificadorDigitos(
+            templates, [self.threshold_template[dig] for dig in self._completos], forma,
+            self.amostragem) if templates else None
+        if self._adaptacao is not None and self._decodificador is not None:
+            self._adaptacao.vincular(self._decodificador.thresholds)
+        # A região ROI cobre também as máscaras, que podem passar dos pontos clicados
+        regiao = templates + [self._decodificador.regiao_amostrada()] if templates else templates
+        self._processador = ProcessadorROI(regiao, forma, self.desfoque)
+        self._detector = None
+        if self.limiar_mudanca is not None:
+            pontos = [p for template in templates for p in template]
+            self._detector = DetectorMudanca(self._processador.regiao, pontos, self.limiar_mudanca)
+        self._lidos = None
+        self._compilado_para = (forma, geracao)
+
+    def tratar_roi(self, frame, brilho=0, contraste=1.0):
+        """Trata só a região dos templates deste display (buffer reutilizado entre frames)."""
+        self._preparar(frame.shape)
+        return self._processador(frame, brilho, contraste)
+
+    def decodificar(self, frame_processado):
+        """Lê todos os dígitos e retorna (resultado, codigos, confianca).
+
+        No resultado, "-" indica dígito ignorado e "?" template incompleto ou confiança abaixo de
+        `confianca_min`; codigos traz o padrão bruto de segmentos de cada dígito e confianca é a
+        menor confiança entre os dígitos não ignorados.
+        """
+        self._preparar(frame_processado.shape)
+        return self._montar_resultado(self._ler_codigos(frame_processado))
+
+    def _ler_codigos(self, frame_processado):
+        if self._decodificador is None:
+            self.luminosidades = {}
+            return {}
+        decodificador = self._decodificador
+        codigos, valores, confiancas, pontos = decodificador.com_confianca(frame_processado)
+        # a..g e, nos templates com 8 pontos, o ponto decimal; um dicionário novo por frame (lido por outras threads)
+        self.luminosidades = {dig: linha + ([ponto] if len(self.templates[dig]) > 7 else [])
+                              for dig, linha, ponto in zip(self._completos, decodificador.amostras.tolist(),
+                                                           decodificador.amostras_ponto.tolist())}
+        if self._adaptacao is not None:
+            self._adaptacao.atualizar(decodificador.amostras, valores, confiancas >= self.confianca_min)
+        return dict(zip(self._completos, zip(codigos.tolist(), valores.tolist(), confiancas.tolist(), pontos.tolist())))
+
+    def amostrar(self, frame_processado):
+        """(dígitos, luminosidades (N, 7)) dos pontos dos templates completos, sem decodificar."""
+        self._preparar(frame_processado.shape)
+        if self._decodificador is None:
+            return (), np.empty((0, 7))
+        return tuple(self._completos), self._decodificador.amostrar(frame_processado)
+
+    def _montar_resultado(self, lidos):
+        # Os dígitos ignorados são aplicados aqui, então mudar "ignorar" vale mesmo para leituras repetidas
+        resultado = []
+        codigos = []
+        confianca = 1.0
+        for dig in self.digitos:
+            codigo, valor, confianca_dig, ponto = lidos.get(dig, (CODIGO_AUSENTE, -1, 0.0, False))
+            if self.ignore_digits[dig]:
+                resultado.append("-")
+                codigo = CODIGO_AUSENTE
+            else:
+                confianca = min(confianca, confianca_dig)
+                if valor < 0 or confianca_dig < self.confianca_min:
+                    resultado.append("?")
+                else:
+                    resultado.append(simbolo_valor(valor) + ("." if ponto else ""))
+            codigos.append(codigo)
+        return resultado, tuple(codigos), confianca
+
+    def ler(self, frame, brilho=0, contraste=1.0, tratar_completo=None):
+        """Trata e decodifica o frame; retorna (frame_processado, resultado, codigos, confianca, repetida).
+
+        Se a região do display não mudou desde a última decodificação (e brilho/contraste são os
+        mesmos), reaproveita o resultado anterior com repetida=True sem tratar nem decodificar.
+        `tratar_completo()`, quando dado, fornece o frame inteiro tratado em vez do tratamento ROI.
+        """
+        self._preparar(frame.shape)
+        parametros = (brilho, contraste)
+        if parametros != self._parametros and self._detector is not None:
+            self._detector.reiniciar()
+        mudou = self._detector is None or self._detector.mudou(frame)
+        if not mudou and self._lidos is not None:
+            resultado, codigos, confianca = self._montar_resultado(self._lidos)
+            return self._ultimo_processado, resultado, codigos, confianca, True
+        inicio = time.perf_counter()
+        if tratar_completo is not None:
+            frame_processado = tratar_completo()
+        else:
+            frame_processado = self.tratar_roi(frame, brilho, contraste)
+        tratado = time.perf_counter()
+        self._lidos = self._ler_codigos(frame_processado)
+        if self.metricas is not None:
+            self.metricas.registrar('tratamento', tratado - inicio)
+            self.metricas.registrar('decodificacao', time.perf_counter() - tratado)
+        self._ultimo_processado = frame_processado
+        self._parametros = parametros
+        resultado, codigos, confianca = self._montar_resultado(self._lidos)
+        return frame_processado, resultado, codigos, confianca, False
+
+def displays_da_config(config):
+    """Lista de Display: um por entrada de config["displays"], ou um único DISPLAY_PADRAO no formato antigo.
+
+    "detectar_mudanca" no nível raiz define o limiar do detector de mudança (false desliga) e
+    "confianca_min", "adaptar_threshold" e "amostragem" os valores dos displays que não definem os seus.
+    """
+    limiar = config.get('detectar_mudanca', LIMIAR_MUDANCA_PADRAO)
+    if limiar is False:
+        limiar = None
+    if 'displays' in config:
+        # Um "filtro" no nível raiz vale para os displays que não definem o seu
+        return [Display(nome, cfg, config.get('filtro'), limiar, config.get('tracking'),
+                        config.get('confianca_min', CONFIANCA_DIGITO_MIN), config.get('adaptar_threshold'),
+                        config.get('amostragem'))
+                for nome, cfg in config['displays'].items()]
+    return [Display(DISPLAY_PADRAO, config, limiar_mudanca=limiar)]
+
+def validar_config(config):
+    """Monta os displays de `config` e compila seus templates; levanta ValueError se algo for inválido.
+
+    Usado antes de aplicar uma configuração recarregada, para que um arquivo com erro não derrube a
+    thread de decodificação.
+    """
+    try:
+        forma = (ALTURA_BASE, LARGURA_BASE)
+        for display in displays_da_config(config):
+            display._preparar(forma)
+    except Exception as erro:
+        raise ValueError(f"{type(erro).__name__}: {erro}") from erro
+
+# ================= Motor de Leitura =================
+@dataclass
+class Leitura:
+    instante: float            # time.monotonic() no momento da captura
+    frame: np.ndarray              # frame BGR capturado (o backend pode reutilizar o buffer)
+    frame_processado: np.ndarray   # imagem usada na decodificação (buffer reutilizado no modo ROI)
+    resultado: list
+    numero: Optional[int]
+    frame_preview: Optional[np.ndarray] = None   # frame inteiro tratado, só para assinantes com frame_completo
+    codigos: tuple = ()        # código de 7 bits por dígito (CODIGO_AUSENTE se ignorado/incompleto)
+    display: str = DISPLAY_PADRAO
+    numero_filtrado: Optional[int] = None   # número após o filtro online do display (igual a numero sem filtro)
+    repetida: bool = False     # a região não mudou: resultado reaproveitado da leitura anterior
+    confianca: float = 1.0     # menor confiança entre os dígitos lidos (0 a 1)
+    luminosidades: dict = field(default_factory=dict)   # dígito -> luminosidades comparadas com os thresholds
+
+class LeitorDisplay:
+    """Captura -> tratamento -> decodificação, sem depender da interface; as threads são do `PipelineLeitura`.
+
+    Todos os displays configurados são lidos da mesma captura: cada frame gera uma `Leitura` por display.
+    Consumidores (preview, calibração) se inscrevem com `inscrever` e recebem cada `Leitura` na
+    thread de decodificação, opcionalmente limitados a uma taxa máxima (por display).
+
+    Com `modo_roi`, só a região dos templates é tratada a cada frame; o frame inteiro só é tratado
+    quando algum assinante com `frame_completo=True` vai recebê-lo.
+    """
+
+    def __init__(self, config=None, taxa_alvo=None, modo_roi=True, captura=None, metricas=None,
+                 configuracao=None):
+        # Com `configuracao` (Configuracao), novas versões publicadas ou recarregadas do arquivo
+        # são aplicadas pela thread de decodificação no início do frame seguinte
+        self.configuracao = configuracao
+        if configuracao is not None and configuracao.validar is None:
+            configuracao.validar = validar_config
+        self._versao_config = configuracao.versao if configuracao is not None else None
+        if config is None and configuracao is not None:
+            config = configuracao.config
+        config = config or {}
+        self._config_original = dict(config)   # preserva chaves que o motor não usa (ex.: "captura")
+        self.captura = captura if captura is not None else criar_captura(config)
+        self.origem_x = config.get('origem_x', ORIGEM_X_PADRAO)
+        self.origem_y = config.get('origem_y', ORIGEM_Y_PADRAO)
+        self.zoom = config.get('zoom', ZOOM_PADRAO)
+        self.brilho = 0
+        self.contraste = 1.0
+        self.displays = displays_da_config(config)
+        self.modo_roi = modo_roi
+        # O frame inteiro tratado (preview e modo sem ROI) segue o "desfoque" da amostragem do nível raiz
+        self.desfoque = (config.get('amostragem') or {}).get('desfoque', True)
+        # Tempos por etapa e contadores (ver metricas.py); compartilhado com os displays e o pipeline
+        self.metricas = metricas if metricas is not None else Metricas()
+        for display in self.displays:
+            display.metricas = self.metricas
+
+        # taxa_alvo em leituras/s; None lê o mais rápido possível
+        self.taxa_alvo = taxa_alvo
+
+        self.ultimas_leituras = {}   # nome do display -> última Leitura
+        self._assinantes = []
+
+    @property
+    def display(self):
+        """Primeiro display (o único, no formato antigo de configuração)."""
+        return self.displays[0]
+
+    @property
+    def ultima_leitura(self):
+        return self.ultimas_leituras.get(self.display.nome)
+
+    # ---------- Configuração ----------
+    def aplicar_templates(self, config):
+        """Restaura os templates de cada display a partir de um dicionário de configuração."""
+        por_nome = {d.nome: d for d in displays_da_config(config)}
+        for display in self.displays:
+            if display.nome in por_nome:
+                display.aplicar_templates(por_nome[display.nome].config())
+
+    def aplicar_config(self, config):
+        """Aplica região de captura e os parâmetros de leitura de cada display a partir de `config`."""
+        self.origem_x = config.get('origem_x', self.origem_x)
+        self.origem_y = config.get('origem_y', self.origem_y)
+        self.zoom = config.get('zoom', self.zoom)
+        for display in self.displays:
+            if 'displays' in config:
+                if display.nome in config['displays']:
+                    display.aplicar_config(config['displays'][display.nome])
+            elif display.nome == DISPLAY_PADRAO:
+                display.aplicar_config(config)
+
+    def publicar_config(self):
+        """Publica o estado atual como nova versão da `configuracao` (gravada no arquivo em segundo plano)."""
+        if self.configuracao is not None:
+            self._versao_config = self.configuracao.atualizar(self.config())
+
+    def _sincronizar_config(self):
+        versao, config = self.configuracao.snapshot()
+        if versao != self._versao_config:
+            self._versao_config = versao
+            self.aplicar_config(config)
+
+    def config(self):
+        """Dicionário no formato do configuracoes.json."""
+        config = dict(self._config_original)
+        config.update({'origem_x': self.origem_x, 'origem_y': self.origem_y, 'zoom': self.zoom})
+        if 'displays' in config:
+            config['displays'] = {d.nome: d.config() for d in self.displays}
+        else:
+            config.update(self.display.config())
+        return config
+
+    # ---------- Assinantes ----------
+    def inscrever(self, callback, taxa_max=None, frame_completo=False):
+        """Registra callback(leitura); com taxa_max, é chamado no máximo taxa_max vezes por segundo por display.
+
+        Com frame_completo=True a leitura entregue traz `frame_preview` (frame inteiro tratado).
+        """
+        intervalo = 1.0 / taxa_max if taxa_max else 0.0
+        self._assinantes.append([callback, intervalo, {}, frame_completo])
+
+    def _devido(self, assinante, nome, instante):
+        return instante - assinante[2].get(nome, float('-inf')) >= assinante[1]
+
+    def _notificar(self, leitura):
+        for assinante in self._assinantes:
+            if self._devido(assinante, leitura.display, leitura.instante):
+                assinante[2][leitura.display] = leitura.instante
+                assinante[0](leitura)
+
+    # ---------- Laço ----------
+    def capturar(self):
+        """Retorna (instante, frame) com o instante tomado na captura; frame None quando a captura termina."""
+        instante = time.monotonic()
+        inicio = time.perf_counter()
+        frame = self.captura.capturar(self.origem_x, self.origem_y, self.zoom)
+        if frame is not None:
+            self.metricas.registrar('captura', time.perf_counter() - inicio)
+            self.metricas.incrementar('frames_lidos')
+        return instante, frame
+
+    def processar(self, instante, frame):
+        """Tracking, tratamento e decodificação de todos os displays; notifica os assinantes.
+
+        Retorna a lista de leituras, uma por display.
+        """
+        if self.configuracao is not None:
+            self._sincronizar_config()
+        # O tracking vem antes do tratamento para que a região ROI já use os templates deslocados
+        metricas = self.metricas
+        for display in self.displays:
+            if display.tracking_ativo:
+                inicio = time.perf_counter()
+                display.rastrear(frame)
+                metricas.registrar('rastreamento', time.perf_counter() - inicio)
+        precisa_preview = any(a[3] and self._devido(a, d.nome, instante)
+                              for a in self._assinantes for d in self.displays)
+        completo = []
+        def tratar_completo():
+            # Frame inteiro tratado no máximo uma vez, e só se alguém precisar dele
+            if not completo:
+                inicio = time.perf_counter()
+                completo.append(tratar_imagem(frame, self.brilho, self.contraste, self.desfoque))
+                metricas.registrar('tratamento_completo', time.perf_counter() - inicio)
+            return completo[0]
+
+        frame_preview = tratar_completo() if precisa_preview else None
+        leituras = []
+        for display in self.displays:
+            frame_processado, resultado, codigos, confianca, repetida = display.ler(
+                frame, self.brilho, self.contraste, None if self.modo_roi else tratar_completo)
+            numero = numero_do_resultado(resultado)
+            metricas.incrementar('frames_repetidos' if repetida else 'frames_decodificados')
+            if "?" in resultado:
+                metricas.incrementar('rejeitados')
+            # Leituras repetidas também passam pelo filtro: as janelas dos filtros contam frames
+            leitura = Leitura(instante, frame, frame_processado, resultado, numero,
+                              frame_preview, codigos, display.nome, display.filtrar(numero), repetida, confianca,
+                              display.luminosidades)
+            self.ultimas_leituras[display.nome] = leitura
+            self._notificar(leitura)
+            leituras.append(leitura)
+        return leituras
+
+    def aguardar_cadencia(self, proximo, evento_parar):
+        """Dorme até o próximo instante ditado por taxa_alvo; retorna a referência para o seguinte."""
+        if not self.taxa_alvo:
+            return proximo
+        proximo += 1.0 / self.taxa_alvo
+        espera = proximo - time.monotonic()
+        if espera > 0:
+            evento_parar.wait(espera)
+            return proximo
+        # Atrasado: não tenta compensar as leituras perdidas
+        return time.monotonic()
+
+# ================= Modo sem Interface =================
+def main():
+    parser = argparse.ArgumentParser(description="Leitura do display de 7 segmentos sem interface gráfica.")
+    parser.add_argument('--config', default=CONFIG_FILE, help="arquivo JSON de configuração")
+    parser.add_argument('--saida', default="dados_digitos.txt", help="arquivo de saída")
+    parser.add_argument('--taxa', type=float, default=None, help="leituras por segundo (padrão: o mais rápido possível)")
+    parser.add_argument('--duracao', type=float, default=None, help="tempo de medição em segundos (padrão: até Ctrl+C)")
+    parser.add_argument('--fila', type=int, default=8, help="tamanho das filas entre os estágios")
+    parser.add_argument('--politica', choices=POLITICAS, default=DESCARTAR_ANTIGO, help="o que fazer com a fila de frames cheia")
+    parser.add_argument('--politica-leituras', choices=POLITICAS, default=BLOQUEAR,
+                        help="o que fazer com a fila de leituras cheia (padrão: esperar a saída)")
+    parser.add_argument('--rle', action='store_true', help="grava trechos de valor constante (início, fim, valor) no texto")
+    parser.add_argument('--binario', default=None, help="arquivo binário de registros de largura fixa (opcional)")
+    parser.add_argument('--max-mb', type=float, default=MAX_MB_PADRAO,
+                        help="rotaciona os arquivos ao passar deste tamanho (0 desliga)")
+    parser.add_argument('--arquivos', type=int, default=MAX_ARQUIVOS_PADRAO,
+                        help="quantos arquivos manter na rotação, contando o atual")
+    parser.add_argument('--calibrar', type=int, default=None, metavar='N',
+                        help="calibra os thresholds por segmento com N frames, grava no JSON e sai")
+    parser.add_argument('--metodo-calibracao', choices=METODOS, default='otsu')
+    parser.add_argument('--metricas-intervalo', type=float, default=None,
+                        help="imprime as métricas por etapa a cada N segundos")
+    parser.add_argument('--metricas-porta', type=int, default=None,
+                        help="serve as métricas (formato Prometheus) em http://127.0.0.1:PORTA/metrics")
+    args = parser.parse_args()
+
+    # Edições no JSON (templates, thresholds, ...) são recarregadas sem reiniciar a medição
+    configuracao = Configuracao(args.config, observar=True)
+    config = configuracao.config
+    leitor = LeitorDisplay(taxa_alvo=args.taxa, configuracao=configuracao)
+    if args.calibrar:
+        print(f"Calibrando com {args.calibrar} frames; varie o valor mostrado no display.")
+        for nome, thresholds in calibrar_leitor(leitor, args.calibrar, args.metodo_calibracao).items():
+            print(f"{nome}: {thresholds}")
+        leitor.publicar_config()
+        configuracao.fechar()
+        return
+    pipeline = PipelineLeitura(leitor, tamanho_fila=args.fila, politica=args.politica,
+                               politica_leituras=args.politica_leituras)
+    inicio = time.monotonic()
+    rotacao = parametros_rotacao(args.max_mb, args.arquivos)
+    varios = len(leitor.displays) > 1
+    RegistroSaida = RegistroRLE if args.rle else RegistroTexto
+    registros = [RegistroPorDisplay({
+        d.nome: RegistroSaida(arquivo_do_display(args.saida, d.nome, varios), inicio, **rotacao)
+        for d in leitor.displays})]
+    if args.binario:
+        registros.append(RegistroPorDisplay({
+            d.nome: RegistroBinario(arquivo_do_display(args.binario, d.nome, varios), inicio, len(d.digitos), **rotacao)
+            for d in leitor.displays}))
+    for registro in registros:
+        pipeline.inscrever_saida(registro.registrar)
+    saidas_metricas = iniciar_saidas(leitor.metricas, config, args.metricas_intervalo, args.metricas_porta)
+    pipeline.iniciar()
+    print("Medição iniciada. Ctrl+C para parar.")
+    try:
+        pipeline.aguardar(args.duracao)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.parar()
+        for registro in registros:
+            registro.fechar()
+        for saida in saidas_metricas:
+            saida.fechar()
+        configuracao.fechar()
+    print(f"Dados salvos em {', '.join(arquivo_do_display(args.saida, d.nome, varios) for d in leitor.displays)}")
+    print("Filas:", pipeline.profundidades())
+    print(leitor.metricas.linha_log())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import os
+import time
+from datetime import timedelta
+from multiprocessing import Pool
+
+import cv2
+
+from captura import CapturaArquivo
+from configuracao import carregar_configuracoes
+from leitor import displays_da_config, exportar_dados_para_txt, numero_do_resultado
+from registro import arquivo_do_display
+
+# ================= Decodificação em Lote (Offline) =================
+# Divide uma gravação (vídeo ou diretório de imagens) em blocos de frames, decodifica os blocos em
+# um pool de processos e junta os resultados na ordem dos frames. Cada processo abre a gravação
+# por conta própria e só recebe de volta (índice do frame, número) das leituras válidas.
+BLOCO_PADRAO = 500      # frames por bloco; vários blocos por processo equilibram a carga
+FPS_DIRETORIO = 10.0    # taxa assumida para diretórios de imagens (sem carimbo de tempo)
+
+def config_lote(config):
+    """Cópia de `config` sem estado que dependa dos frames anteriores (detecção de mudança e adaptação dos thresholds).
+
+    Cada bloco começa com displays novos; sem isso, a leitura de um frame dependeria de onde o bloco começa.
+    """
+    config = dict(config, detectar_mudanca=False)
+    config.pop('adaptar_threshold', None)
+    if 'displays' in config:
+        config['displays'] = {nome: {k: v for k, v in cfg.items() if k != 'adaptar_threshold'}
+                              for nome, cfg in config['displays'].items()}
+    return config
+
+def _iniciar_processo():
+    # Um processo por núcleo: o OpenCV não deve abrir threads próprias em cada um
+    cv2.setNumThreads(1)
+
+def decodificar_bloco(tarefa):
+    """Decodifica os frames [inicio, fim) e retorna {display: [(índice, número), ...]} das leituras válidas."""
+    caminho, config, inicio, fim, brilho, contraste = tarefa
+    displays = displays_da_config(config)
+    leituras = {d.nome: [] for d in displays}
+    captura = CapturaArquivo(caminho)
+    try:
+        captura.posicionar(inicio)
+        for indice in range(inicio, fim):
+            frame = captura.capturar()
+            if frame is None:
+                break
+            for display in displays:
+                _, resultado, _, _, _ = display.ler(frame, brilho, contraste)
+                numero = numero_do_resultado(resultado)
+                if numero is not None:
+                    leituras[display.nome].append((indice, numero))
+    finally:
+        captura.fechar()
+    return leituras
+
+def blocos(total, tamanho):
+    """Intervalos [inicio, fim) que cobrem `total` frames."""
+    return [(inicio, min(inicio + tamanho, total)) for inicio in range(0, total, tamanho)]
+
+def decodificar_gravacao(caminho, config, processos=None, bloco=BLOCO_PADRAO, fps=None, brilho=0, contraste=1.0):
+    """Decodifica a gravação inteira em paralelo; retorna {display: (tempos, números)} em ordem de frame.
+
+    Os tempos (timedelta) vêm do índice do frame dividido pela taxa de quadros. A detecção de mudança
+    e a adaptação dos thresholds ficam desligadas (ver `config_lote`), então cada frame é decodificado
+    só com os thresholds da configuração; os filtros online de cada display são aplicados aqui, em
+    sequência. Assim o resultado não depende do tamanho dos blocos.
+    """
+    config = config_lote(config)
+    captura = CapturaArquivo(caminho)
+    total = captura.total_frames
+    fps = fps or captura.fps or FPS_DIRETORIO
+    captura.fechar()
+    displays = displays_da_config(config)
+    tempos = {d.nome: [] for d in displays}
+    numeros = {d.nome: [] for d in displays}
+    tarefas = [(caminho, config, inicio, fim, brilho, contraste) for inicio, fim in blocos(total, bloco)]
+    with Pool(processos, initializer=_iniciar_processo) as pool:
+        # imap devolve os blocos na ordem de envio, então a junção já sai em ordem de tempo
+        for i, leituras in enumerate(pool.imap(decodificar_bloco, tarefas), 1):
+            for display in displays:
+                for indice, numero in leituras[display.nome]:
+                    tempos[display.nome].append(timedelta(seconds=indice / fps))
+                    numeros[display.nome].append(display.filtrar(numero))
+            print(f"Bloco {i}/{len(tarefas)}")
+    return {nome: (tempos[nome], numeros[nome]) for nome in tempos}
+
+def main():
+    parser = argparse.ArgumentParser(description="Decodifica uma gravação (vídeo ou diretório de imagens) em paralelo.")
+    parser.add_argument('gravacao', help="arquivo de vídeo ou diretório de imagens")
+    parser.add_argument('--config', default='configuracoes.json', help="arquivo JSON com os templates")
+    parser.add_argument('--saida', default="dados_digitos.txt", help="arquivo de saída (um por display se houver vários)")
+    parser.add_argument('--processos', type=int, default=None, help="processos em paralelo (padrão: um por núcleo)")
+    parser.add_argument('--bloco', type=int, default=BLOCO_PADRAO, help="frames por bloco")
+    parser.add_argument('--fps', type=float, default=None,
+                        help=f"taxa de quadros para os tempos (padrão: a do vídeo, ou {FPS_DIRETORIO:g} para diretórios)")
+    parser.add_argument('--brilho', type=int, default=0)
+    parser.add_argument('--contraste', type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = carregar_configuracoes(args.config)
+    inicio = time.perf_counter()
+    resultados = decodificar_gravacao(args.gravacao, config, args.processos, args.bloco, args.fps,
+                                      args.brilho, args.contraste)
+    print(f"Decodificado em {time.perf_counter() - inicio:.1f} s ({args.processos or os.cpu_count()} processos).")
+    varios = len(resultados) > 1
+    for nome, (tempos, numeros) in resultados.items():
+        exportar_dados_para_txt(tempos, numeros, arquivo_do_display(args.saida, nome, varios))
+
+if __name__ == '__main__':
+    main()
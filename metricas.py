@@ -0,0 +1,175 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# ================= Métricas do Laço de Leitura =================
+# Tempos por etapa (segundos) em janelas circulares de tamanho fixo, mais contadores. O registro
+# no caminho quente é só uma escrita no array sob um lock; percentis são calculados apenas quando
+# alguém pede o resumo (linha de log periódica ou endpoint HTTP).
+JANELA_PADRAO = 1024         # últimas amostras por etapa usadas nos percentis
+PERCENTIS = (50, 95, 99)
+PREFIXO = 'leitor'           # prefixo dos nomes no formato Prometheus
+
+class _Janela:
+    def __init__(self, tamanho):
+        self.valores = np.zeros(tamanho)
+        self.posicao = 0
+        self.total = 0          # amostras desde o início (não só as da janela)
+        self.soma = 0.0
+
+    def adicionar(self, valor):
+        self.valores[self.posicao] = valor
+        self.posicao = (self.posicao + 1) % len(self.valores)
+        self.total += 1
+        self.soma += valor
+
+    def recentes(self):
+        return self.valores[:min(self.total, len(self.valores))].copy()
+
+class Metricas:
+    """Temporizadores por etapa e contadores compartilhados entre as threads do leitor.
+
+    Uso no caminho quente:
+        inicio = time.perf_counter()
+        ...
+        metricas.registrar('captura', time.perf_counter() - inicio)
+        metricas.incrementar('frames_lidos')
+
+    Valores que já existem em outro lugar (profundidade das filas, descartes) entram com
+    `medidor(nome, funcao)` e só são lidos no resumo.
+    """
+
+    def __init__(self, janela=JANELA_PADRAO):
+        self.janela = janela
+        self.inicio = time.monotonic()
+        self._etapas = {}
+        self._contadores = {}
+        self._medidores = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, duracao):
+        with self._lock:
+            janela = self._etapas.get(etapa)
+            if janela is None:
+                janela = self._etapas[etapa] = _Janela(self.janela)
+            janela.adicionar(duracao)
+
+    def incrementar(self, contador, n=1):
+        with self._lock:
+            self._contadores[contador] = self._contadores.get(contador, 0) + n
+
+    def medidor(self, nome, funcao, contador=False):
+        """Registra funcao() -> número, lida a cada resumo; contador=True para valores que só crescem."""
+        self._medidores[nome] = (funcao, contador)
+
+    def resumo(self):
+        """{'etapas': {etapa: {n, soma, p50, p95, p99, max}}, 'contadores': {...}, 'medidores': {...}}."""
+        with self._lock:
+            amostras = {etapa: (j.recentes(), j.total, j.soma) for etapa, j in self._etapas.items()}
+            contadores = dict(self._contadores)
+        etapas = {}
+        for etapa, (recentes, total, soma) in amostras.items():
+            estatisticas = {'n': total, 'soma': soma}
+            if len(recentes):
+                for p, v in zip(PERCENTIS, np.percentile(recentes, PERCENTIS)):
+                    estatisticas[f'p{p}'] = float(v)
+                estatisticas['max'] = float(recentes.max())
+            etapas[etapa] = estatisticas
+        medidores = {}
+        for nome, (funcao, contador) in self._medidores.items():
+            (contadores if contador else medidores)[nome] = funcao()
+        return {'segundos': time.monotonic() - self.inicio, 'etapas': etapas,
+                'contadores': contadores, 'medidores': medidores}
+
+    def linha_log(self, resumo=None):
+        """Uma linha com p50/p95 (ms) de cada etapa, contadores e medidores."""
+        resumo = resumo or self.resumo()
+        partes = [f"{etapa} {e['p50'] * 1e3:.3f}/{e['p95'] * 1e3:.3f}ms"
+                  for etapa, e in resumo['etapas'].items() if 'p50' in e]
+        partes += [f"{nome}={valor}" for nome, valor in {**resumo['contadores'], **resumo['medidores']}.items()]
+        return "[métricas] " + "  ".join(partes)
+
+    def texto_prometheus(self, resumo=None):
+        """Resumo no formato de texto do Prometheus (etapas como summary, percentis da janela recente)."""
+        resumo = resumo or self.resumo()
+        linhas = [f"# TYPE {PREFIXO}_etapa_segundos summary"]
+        for etapa, e in resumo['etapas'].items():
+            for p in PERCENTIS:
+                if f'p{p}' in e:
+                    linhas.append(f'{PREFIXO}_etapa_segundos{{etapa="{etapa}",quantile="{p / 100}"}} {e[f"p{p}"]:.9f}')
+            linhas.append(f'{PREFIXO}_etapa_segundos_sum{{etapa="{etapa}"}} {e["soma"]:.9f}')
+            linhas.append(f'{PREFIXO}_etapa_segundos_count{{etapa="{etapa}"}} {e["n"]}')
+        for nome, valor in resumo['contadores'].items():
+            linhas += [f"# TYPE {PREFIXO}_{nome}_total counter", f"{PREFIXO}_{nome}_total {valor}"]
+        for nome, valor in resumo['medidores'].items():
+            linhas += [f"# TYPE {PREFIXO}_{nome} gauge", f"{PREFIXO}_{nome} {valor}"]
+        return "\n".join(linhas) + "\n"
+
+# ================= Saídas das Métricas =================
+class LogPeriodico:
+    """Imprime `Metricas.linha_log()` a cada `intervalo` segundos em uma thread própria."""
+
+    def __init__(self, metricas, intervalo, saida=print):
+        self.metricas = metricas
+        self.intervalo = intervalo
+        self.saida = saida
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="Metricas-log", daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.saida(self.metricas.linha_log())
+
+    def fechar(self):
+        self._parar.set()
+        self._thread.join()
+
+class ServidorMetricas:
+    """Endpoint HTTP local (GET /metrics) com as métricas no formato de texto do Prometheus."""
+
+    def __init__(self, metricas, porta, host='127.0.0.1'):
+        class Tratador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                corpo = metricas.texto_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((host, porta), Tratador)
+        self.porta = self._servidor.server_address[1]
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="Metricas-http", daemon=True)
+        self._thread.start()
+
+    def fechar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        self._thread.join()
+
+def iniciar_saidas(metricas, config=None, intervalo=None, porta=None):
+    """Abre o log periódico e/ou o endpoint HTTP conforme argumentos ou config["metricas"].
+
+    Exemplo no JSON: "metricas": {"intervalo": 10, "porta": 9100}. Retorna a lista de saídas abertas
+    (cada uma com `fechar()`).
+    """
+    opcoes = (config or {}).get('metricas', {})
+    intervalo = intervalo if intervalo is not None else opcoes.get('intervalo')
+    porta = porta if porta is not None else opcoes.get('porta')
+    saidas = []
+    if intervalo:
+        saidas.append(LogPeriodico(metricas, intervalo))
+    if porta is not None:
+        servidor = ServidorMetricas(metricas, porta, opcoes.get('host', '127.0.0.1'))
+        print(f"Métricas em http://{opcoes.get('host', '127.0.0.1')}:{servidor.porta}/metrics")
+        saidas.append(servidor)
+    return saidas
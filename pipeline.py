@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+# ================= Filas entre Estágios =================
+DESCARTAR_ANTIGO = 'descartar_antigo'
+BLOQUEAR = 'bloquear'
+POLITICAS = (DESCARTAR_ANTIGO, BLOQUEAR)
+
+FIM = object()   # sentinela: a fila foi fechada e esvaziada
+
+class FilaLimitada:
+    """Fila limitada entre threads com política de transbordo.
+
+    DESCARTAR_ANTIGO descarta o item mais antigo para abrir espaço (o produtor nunca espera);
+    BLOQUEAR faz o produtor esperar até haver espaço.
+    """
+
+    def __init__(self, tamanho, politica=DESCARTAR_ANTIGO):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de fila desconhecida: {politica} (opções: {', '.join(POLITICAS)})")
+        self.tamanho = tamanho
+        self.politica = politica
+        self.descartados = 0
+        self._itens = deque()
+        self._cond = threading.Condition()
+        self._fechada = False
+
+    def __len__(self):
+        return len(self._itens)
+
+    def colocar(self, item):
+        with self._cond:
+            if self.politica == BLOQUEAR:
+                while len(self._itens) >= self.tamanho and not self._fechada:
+                    self._cond.wait()
+            elif len(self._itens) >= self.tamanho:
+                self._itens.popleft()
+                self.descartados += 1
+            if self._fechada:
+                return
+            self._itens.append(item)
+            self._cond.notify_all()
+
+    def retirar(self):
+        """Próximo item; FIM quando a fila foi fechada e não há mais itens."""
+        with self._cond:
+            while not self._itens and not self._fechada:
+                self._cond.wait()
+            if not self._itens:
+                return FIM
+            item = self._itens.popleft()
+            self._cond.notify_all()
+            return item
+
+    def fechar(self):
+        with self._cond:
+            self._fechada = True
+            self._cond.notify_all()
+
+# ================= Pipeline de Leitura =================
+class PipelineLeitura:
+    """Captura, decodificação e saída em threads separadas ligadas por filas limitadas.
+
+    O instante de cada frame é tomado na captura, então atrasos na decodificação ou no disco não
+    distorcem os tempos registrados. Os assinantes do `LeitorDisplay` (preview) são chamados na
+    thread de decodificação; as saídas registradas com `inscrever_saida` rodam na thread de saída.
+
+    A `politica` vale para a fila de frames; a de leituras bloqueia por padrão, então um disco lento
+    segura a decodificação e o excesso é descartado como frames, sem perder medições já decodificadas.
+
+    Se um estágio levanta uma exceção, o pipeline inteiro para (as duas filas são fechadas) e a
+    exceção é relançada por `aguardar()` ou `parar()`.
+    """
+
+    def __init__(self, leitor, tamanho_fila=8, politica=DESCARTAR_ANTIGO, politica_leituras=BLOQUEAR):
+        self.leitor = leitor
+        self.fila_frames = FilaLimitada(tamanho_fila, politica)
+        self.fila_leituras = FilaLimitada(tamanho_fila, politica_leituras)
+        self._saidas = []
+        self._parar = threading.Event()
+        self._threads = []
+        self.erro = None    # primeira exceção levantada por um estágio
+        metricas = leitor.metricas
+        metricas.medidor('fila_frames', lambda: len(self.fila_frames))
+        metricas.medidor('fila_leituras', lambda: len(self.fila_leituras))
+        metricas.medidor('frames_descartados', lambda: self.fila_frames.descartados, contador=True)
+        metricas.medidor('leituras_descartadas', lambda: self.fila_leituras.descartados, contador=True)
+
+    def inscrever_saida(self, callback):
+        """Registra callback(leitura) executado na thread de saída (arquivo, rede, ...)."""
+        self._saidas.append(callback)
+
+    def profundidades(self):
+        """Itens aguardando em cada fila e quantos já foram descartados."""
+        return {
+            'frames': len(self.fila_frames),
+            'frames_descartados': self.fila_frames.descartados,
+            'leituras': len(self.fila_leituras),
+            'leituras_descartadas': self.fila_leituras.descartados,
+        }
+
+    # ---------- Estágios ----------
+    def _falhar(self, erro):
+        # Um estágio morto não pode deixar os outros capturando/descartando (ou bloqueados) para sempre
+        if self.erro is None:
+            self.erro = erro
+            print(f"Pipeline interrompido por erro em {threading.current_thread().name}: {erro!r}")
+        self._parar.set()
+        self.fila_frames.fechar()
+        self.fila_leituras.fechar()
+
+    def _capturar(self):
+        proximo = time.monotonic()
+        try:
+            while not self._parar.is_set():
+                instante, frame = self.leitor.capturar()
+                if frame is None:
+                    break
+                # Cópia: o backend de captura reutiliza o buffer no frame seguinte
+                self.fila_frames.colocar((instante, frame.copy()))
+                proximo = self.leitor.aguardar_cadencia(proximo, self._parar)
+        except Exception as erro:
+            self._falhar(erro)
+        finally:
+            self.leitor.captura.fechar()
+            self.fila_frames.fechar()
+
+    def _decodificar(self):
+        try:
+            while True:
+                item = self.fila_frames.retirar()
+                if item is FIM:
+                    break
+                for leitura in self.leitor.processar(*item):
+                    self.fila_leituras.colocar(leitura)
+        except Exception as erro:
+            self._falhar(erro)
+        finally:
+            self.fila_leituras.fechar()
+
+    def _saida(self):
+        try:
+            while True:
+                leitura = self.fila_leituras.retirar()
+                if leitura is FIM:
+                    break
+                inicio = time.perf_counter()
+                for callback in self._saidas:
+                    callback(leitura)
+                self.leitor.metricas.registrar('saida', time.perf_counter() - inicio)
+        except Exception as erro:
+            self._falhar(erro)
+
+    # ---------- Controle ----------
+    def iniciar(self):
+        self._parar.clear()
+        self.erro = None
+        self._threads = [
+            threading.Thread(target=self._capturar, name="Pipeline-captura", daemon=True),
+            threading.Thread(target=self._decodificar, name="Pipeline-decodificacao", daemon=True),
+            threading.Thread(target=self._saida, name="Pipeline-saida", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def aguardar(self, timeout=None):
+        """Espera o fim da gravação (todas as filas esvaziadas) ou o timeout; True se terminou."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            while thread.is_alive():
+                restante = 0.5 if limite is None else min(0.5, limite - time.monotonic())
+                if restante <= 0:
+                    return False
+                thread.join(restante)
+        self._relancar_erro()
+        return True
+
+    def parar(self):
+        """Interrompe a captura e deixa os estágios seguintes esvaziarem as filas."""
+        self._parar.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._relancar_erro()
+
+    def _relancar_erro(self):
+        # Relança uma vez só (aguardar() seguido de parar() num finally não repete o erro)
+        erro, self.erro = self.erro, None
+        if erro is not None:
+            raise erro
@@ -0,0 +1,136 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# ================= Tratamento de Imagem =================
+# Margem (px) em volta dos pontos dos templates; cobre o kernel 5x5 do blur e dá contexto ao equalizeHist
+MARGEM_ROI = 8
+
+@lru_cache(maxsize=16)
+def tabela_brilho_contraste(brilho=0, contraste=1.0):
+    """LUT uint8 equivalente a `ajustar_brilho_contraste` (não modificar o array retornado)."""
+    tabela = np.clip(contraste * np.arange(256) + brilho, 0, 255).astype(np.uint8)
+    tabela.setflags(write=False)
+    return tabela
+
+def ajustar_brilho_contraste(img, brilho=0, contraste=1.0):
+    return cv2.LUT(img, tabela_brilho_contraste(brilho, contraste))
+
+def tratar_imagem(img, brilho=0, contraste=1.0, desfoque=True):
+    """Brilho/contraste, cinza, blur 5x5 e equalização; sem `desfoque` o blur é pulado (amostragem por área)."""
+    img_ajustada = ajustar_brilho_contraste(img, brilho, contraste)
+    img_gray = cv2.cvtColor(img_ajustada, cv2.COLOR_BGR2GRAY)
+    img_blur = cv2.GaussianBlur(img_gray, (5, 5), 0) if desfoque else img_gray
+    img_eq = cv2.equalizeHist(img_blur)
+    return img_eq
+
+def regiao_dos_templates(templates, forma, margem=MARGEM_ROI):
+    """Bounding box (x0, y0, x1, y1) que une todos os pontos dos templates, com margem e recortada ao frame."""
+    pontos = [p for template in templates for p in template]
+    if not pontos:
+        return None
+    h, w = forma[:2]
+    xs = [int(p[0]) for p in pontos]
+    ys = [int(p[1]) for p in pontos]
+    x0, y0 = max(min(xs) - margem, 0), max(min(ys) - margem, 0)
+    x1, y1 = min(max(xs) + margem + 1, w), min(max(ys) + margem + 1, h)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+class ProcessadorROI:
+    """Aplica `tratar_imagem` só na região dos templates, reaproveitando os buffers entre frames.
+
+    O resultado é escrito em um buffer do tamanho do frame (zeros fora da região), de modo que as
+    coordenadas dos templates continuam valendo. O buffer é reutilizado: a imagem retornada só é
+    válida até a próxima chamada. Como o equalizeHist usa o histograma da região e não do frame
+    inteiro, os níveis de cinza podem diferir levemente do processamento completo.
+    """
+
+    def __init__(self, templates, forma, desfoque=True):
+        self.forma = tuple(forma[:2])
+        self.desfoque = desfoque
+        self.regiao = regiao_dos_templates(templates, forma)
+        self.saida = np.zeros(self.forma, dtype=np.uint8)
+        if self.regiao is not None:
+            x0, y0, x1, y1 = self.regiao
+            self._ajustada = np.empty((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+            self._gray = np.empty((y1 - y0, x1 - x0), dtype=np.uint8)
+            self._blur = np.empty_like(self._gray)
+
+    def __call__(self, img, brilho=0, contraste=1.0):
+        if self.regiao is None:
+            return tratar_imagem(img, brilho, contraste, self.desfoque)
+        x0, y0, x1, y1 = self.regiao
+        cv2.LUT(img[y0:y1, x0:x1], tabela_brilho_contraste(brilho, contraste), dst=self._ajustada)
+        cv2.cvtColor(self._ajustada, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self.desfoque:
+            cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._blur)
+            cv2.equalizeHist(self._blur, dst=self.saida[y0:y1, x0:x1])
+        else:
+            cv2.equalizeHist(self._gray, dst=self.saida[y0:y1, x0:x1])
+        return self.saida
+
+# ================= Detecção de Mudança =================
+# Diferença absoluta média por pixel (0-255), no recorte de algum segmento, a partir da qual o display mudou
+LIMIAR_MUDANCA_PADRAO = 1.0
+RAIO_MUDANCA = 3   # recorte de (2*RAIO+1)^2 px em volta de cada ponto dos templates
+
+class DetectorMudanca:
+    """Compara recortes em volta dos pontos dos templates no frame bruto com os do último frame decodificado.
+
+    A diferença é medida em cada recorte (um por segmento) e vale a maior: a troca de um único
+    segmento não é diluída pelos pixels que não mudaram, como seria na média da região inteira.
+    A referência só é trocada quando há mudança, então variações lentas não se acumulam sem serem
+    percebidas. Custa um absdiff e uma imagem integral sobre a região, bem menos que tratar e decodificar.
+    """
+
+    def __init__(self, regiao, pontos, limiar=LIMIAR_MUDANCA_PADRAO, raio=RAIO_MUDANCA):
+        self.regiao = regiao
+        self.limiar = limiar
+        self._referencia = None
+        self._recortes = None
+        if regiao is not None:
+            x0, y0, x1, y1 = regiao
+            centros = np.array([(int(p[0]), int(p[1])) for p in pontos], dtype=np.intp).reshape(-1, 2)
+            # Cantos de cada recorte, relativos à região e limitados a ela
+            xa = np.clip(centros[:, 0] - raio - x0, 0, x1 - x0)
+            xb = np.clip(centros[:, 0] + raio + 1 - x0, 0, x1 - x0)
+            ya = np.clip(centros[:, 1] - raio - y0, 0, y1 - y0)
+            yb = np.clip(centros[:, 1] + raio + 1 - y0, 0, y1 - y0)
+            validos = (xb > xa) & (yb > ya)
+            self._recortes = (xa[validos], xb[validos], ya[validos], yb[validos])
+            self._areas = ((xb - xa) * (yb - ya))[validos]
+
+    def reiniciar(self):
+        self._referencia = None
+
+    def diferenca(self, recorte):
+        """Maior diferença média por pixel (e canal) entre os recortes de `recorte` e os da referência."""
+        diferenca = cv2.absdiff(recorte, self._referencia)
+        canais = 1 if diferenca.ndim == 2 else diferenca.shape[2]
+        integral = cv2.integral(diferenca)
+        if integral.ndim == 3:
+            integral = integral.sum(axis=2)
+        xa, xb, ya, yb = self._recortes
+        if not len(xa):
+            # Sem pontos dentro da região: média da região inteira
+            return integral[-1, -1] / diferenca.size
+        somas = integral[yb, xb] - integral[ya, xb] - integral[yb, xa] + integral[ya, xa]
+        return float((somas / (self._areas * canais)).max())
+
+    def mudou(self, frame):
+        """True se algum segmento mudou desde a última referência (a primeira chamada sempre retorna True)."""
+        if self.regiao is None:
+            return True
+        x0, y0, x1, y1 = self.regiao
+        recorte = frame[y0:y1, x0:x1]
+        if self._referencia is not None and self._referencia.shape == recorte.shape:
+            if self.diferenca(recorte) <= self.limiar:
+                return False
+        if self._referencia is None or self._referencia.shape != recorte.shape:
+            self._referencia = recorte.copy()
+        else:
+            np.copyto(self._referencia, recorte)
+        return True
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+# ================= Tracking do Display =================
+JANELA_PADRAO = 24          # px de busca em volta da última posição
+NIVEIS_PADRAO = 2           # níveis da pirâmide além do original
+CONFIANCA_MIN_PADRAO = 0.6  # TM_CCOEFF_NORMED abaixo disso é descartado
+TAMANHO_MIN_NIVEL = 12      # lado mínimo do template no nível mais grosso da pirâmide
+REFINO = 2                  # px de folga ao refinar a posição no nível seguinte
+
+def _piramide(img, niveis):
+    piramide = [img]
+    for _ in range(niveis):
+        piramide.append(cv2.pyrDown(piramide[-1]))
+    return piramide
+
+class Rastreador:
+    """Segue o display com template matching em uma janela em volta da última posição.
+
+    A busca começa no nível mais grosso de uma pirâmide e é refinada nos níveis seguintes, então o
+    custo depende do tamanho do display e da janela, não do tamanho da captura. O template de
+    referência é fixo (sem deriva); com `atualizacao` > 0 ele é misturado lentamente às correspondências
+    confiáveis. Correspondências abaixo de `confianca_min` são descartadas e a posição é mantida.
+    """
+
+    def __init__(self, frame, bbox, janela=JANELA_PADRAO, niveis=NIVEIS_PADRAO,
+                 confianca_min=CONFIANCA_MIN_PADRAO, atualizacao=0.0):
+        x, y, w, h = (int(v) for v in bbox)
+        self.posicao = (x, y)
+        self.tamanho = (w, h)
+        self.janela = janela
+        self.confianca_min = confianca_min
+        self.atualizacao = atualizacao
+        self.confianca = 1.0
+        # Limita os níveis para o template não ficar pequeno demais no nível mais grosso
+        self.niveis = 0
+        while self.niveis < niveis and min(w, h) >> (self.niveis + 1) >= TAMANHO_MIN_NIVEL:
+            self.niveis += 1
+        self._referencia = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
+        self._acumulada = None   # referência em float32, só usada com atualizacao > 0
+        self._piramide_ref = _piramide(self._referencia, self.niveis)
+
+    @property
+    def bbox(self):
+        return (*self.posicao, *self.tamanho)
+
+    def atualizar(self, frame):
+        """Procura o display no frame (BGR); retorna a nova posição (x, y) ou None se a correspondência foi rejeitada."""
+        x, y = self.posicao
+        w, h = self.tamanho
+        altura, largura = frame.shape[:2]
+        x0, y0 = max(x - self.janela, 0), max(y - self.janela, 0)
+        x1, y1 = min(x + w + self.janela, largura), min(y + h + self.janela, altura)
+        if x1 - x0 < w or y1 - y0 < h:
+            return None
+        janela = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        piramide = _piramide(janela, self.niveis)
+
+        # Nível mais grosso: busca em toda a janela
+        res = cv2.matchTemplate(piramide[-1], self._piramide_ref[-1], cv2.TM_CCOEFF_NORMED)
+        _, confianca, _, (lx, ly) = cv2.minMaxLoc(res)
+        # Níveis seguintes: só em volta da posição vinda do nível anterior
+        for nivel in range(self.niveis - 1, -1, -1):
+            img, ref = piramide[nivel], self._piramide_ref[nivel]
+            rh, rw = ref.shape
+            cx = min(max(lx * 2 - REFINO, 0), img.shape[1] - rw)
+            cy = min(max(ly * 2 - REFINO, 0), img.shape[0] - rh)
+            recorte = img[cy:min(cy + rh + 2 * REFINO, img.shape[0]), cx:min(cx + rw + 2 * REFINO, img.shape[1])]
+            res = cv2.matchTemplate(recorte, ref, cv2.TM_CCOEFF_NORMED)
+            _, confianca, _, (rx, ry) = cv2.minMaxLoc(res)
+            lx, ly = cx + rx, cy + ry
+
+        self.confianca = confianca
+        if confianca < self.confianca_min:
+            return None
+        self.posicao = (x0 + lx, y0 + ly)
+        if self.atualizacao > 0:
+            # Atualização lenta da referência com o trecho casado (compensa mudanças graduais de iluminação)
+            if self._acumulada is None:
+                self._acumulada = self._referencia.astype(np.float32)
+            cv2.accumulateWeighted(janela[ly:ly+h, lx:lx+w], self._acumulada, self.atualizacao)
+            self._referencia = cv2.convertScaleAbs(self._acumulada)
+            self._piramide_ref = _piramide(self._referencia, self.niveis)
+        return self.posicao
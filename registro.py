@@ -0,0 +1,223 @@
+import os
+import time
+
+import numpy as np
+
+from decodificacao import CODIGO_AUSENTE
+
+# ================= Registro Contínuo das Medições =================
+# As leituras são gravadas à medida que chegam, em lotes, e o arquivo é descarregado periodicamente;
+# uma queda do programa perde no máximo o último lote. Ao passar de max_bytes o arquivo é rotacionado
+# (arquivo -> arquivo.1 -> ... -> arquivo.N), limitando o uso de disco.
+LOTE_PADRAO = 64
+INTERVALO_FLUSH_PADRAO = 1.0   # segundos
+MAX_MB_PADRAO = 100.0          # tamanho (MB) a partir do qual a interface e o leitor rotacionam os arquivos
+MAX_ARQUIVOS_PADRAO = 5
+# Número de uma leitura inválida no registro binário (-1 é uma leitura válida desde o sinal de menos)
+NUMERO_INVALIDO = np.iinfo(np.int64).min
+
+def formatar_tempo(segundos, decimais=0):
+    """HH:MM:SS, com `decimais` casas de fração de segundo (truncadas); negativos viram 0."""
+    segundos = max(segundos, 0)
+    total_seconds = int(segundos)
+    horas = total_seconds // 3600
+    minutos = (total_seconds % 3600) // 60
+    texto = f"{horas:02}:{minutos:02}:{total_seconds % 60:02}"
+    if decimais:
+        fracao = int((segundos - total_seconds) * 10 ** decimais)
+        texto += f".{fracao:0{decimais}d}"
+    return texto
+
+def parametros_rotacao(max_mb=MAX_MB_PADRAO, max_arquivos=MAX_ARQUIVOS_PADRAO):
+    """kwargs de rotação dos registros; max_mb None ou 0 desliga a rotação."""
+    return {'max_bytes': int(max_mb * 1e6) if max_mb else None, 'max_arquivos': max_arquivos}
+
+def dtype_registro(n_digitos):
+    """Registro binário de largura fixa: instante (s desde o início), número lido e filtrado e códigos.
+
+    Leituras inválidas têm `numero`/`filtrado` iguais a NUMERO_INVALIDO.
+    """
+    return np.dtype([('instante', '<f8'), ('numero', '<i8'), ('filtrado', '<i8'), ('codigos', 'u1', (n_digitos,))])
+
+def ler_registro_binario(arquivo, n_digitos):
+    """Abre um registro binário sem carregá-lo na memória."""
+    return np.memmap(arquivo, dtype=dtype_registro(n_digitos), mode='r')
+
+def _segundos(texto):
+    h, m, s = texto.split(':')
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+def ler_registro_texto(arquivo):
+    """Lê um registro de texto; retorna (segundos, números) como arrays.
+
+    Aceita também o formato RLE ("início, fim, valor"): cada trecho vira dois pontos, no início e no fim.
+    """
+    segundos, numeros = [], []
+    with open(arquivo, 'r') as entrada:
+        for linha in entrada:
+            partes = linha.strip().split(', ')
+            if len(partes) < 2:
+                continue
+            if len(partes) >= 3 and ':' in partes[1]:
+                t0, t1, numero = _segundos(partes[0]), _segundos(partes[1]), int(partes[2])
+                segundos += [t0, t1] if t1 > t0 else [t0]
+                numeros += [numero] * (2 if t1 > t0 else 1)
+                continue
+            segundos.append(_segundos(partes[0]))
+            numeros.append(int(partes[1]))
+    return np.array(segundos), np.array(numeros, dtype=np.int64)
+
+class _RegistroRotativo:
+    modo = 'a'
+
+    def __init__(self, arquivo, inicio, lote=LOTE_PADRAO, intervalo_flush=INTERVALO_FLUSH_PADRAO,
+                 max_bytes=None, max_arquivos=5, sobrescrever=True):
+        self.arquivo = arquivo
+        self.inicio = inicio            # time.monotonic() do início da medição
+        self.lote = lote
+        self.intervalo_flush = intervalo_flush
+        self.max_bytes = max_bytes
+        self.max_arquivos = max_arquivos
+        self._pendentes = []
+        self._ultimo_flush = time.monotonic()
+        self._saida = open(arquivo, self.modo.replace('a', 'w') if sobrescrever else self.modo)
+
+    def registrar(self, leitura):
+        item = self._formatar(leitura)
+        if item is not None:
+            self._pendentes.append(item)
+        # O descarregamento por tempo vale mesmo quando a leitura não gerou item (inválida ou trecho RLE aberto)
+        if len(self._pendentes) >= self.lote or time.monotonic() - self._ultimo_flush >= self.intervalo_flush:
+            self.descarregar()
+
+    def descarregar(self):
+        if self._pendentes:
+            self._escrever(self._pendentes)
+            self._pendentes = []
+        self._saida.flush()
+        self._ultimo_flush = time.monotonic()
+        if self.max_bytes is not None and self._saida.tell() >= self.max_bytes:
+            self._rotacionar()
+
+    def _rotacionar(self):
+        self._saida.close()
+        for i in range(self.max_arquivos - 1, 0, -1):
+            origem = f"{self.arquivo}.{i}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{self.arquivo}.{i + 1}")
+        os.replace(self.arquivo, f"{self.arquivo}.1")
+        excedente = f"{self.arquivo}.{self.max_arquivos}"
+        if os.path.exists(excedente):
+            os.remove(excedente)
+        self._saida = open(self.arquivo, self.modo)
+
+    def fechar(self):
+        self.descarregar()
+        self._saida.close()
+
+class RegistroTexto(_RegistroRotativo):
+    """Formato do dados_digitos.txt ("HH:MM:SS.mmm, numero, códigos"); só leituras válidas.
+
+    O número gravado é o filtrado (o bruto, se o display não tem filtro); o valor bruto fica no
+    registro binário. A terceira coluna traz os códigos de segmento em hexa; Trata.py continua
+    lendo as duas primeiras.
+    """
+
+    def _formatar(self, leitura):
+        numero = leitura.numero_filtrado if leitura.numero_filtrado is not None else leitura.numero
+        if numero is None:
+            return None
+        codigos = " ".join(f"{c:02x}" for c in leitura.codigos)
+        return f"{formatar_tempo(leitura.instante - self.inicio, decimais=3)}, {numero}, {codigos}\n"
+
+    def _escrever(self, linhas):
+        self._saida.write("".join(linhas))
+
+class RegistroRLE(_RegistroRotativo):
+    """Uma linha por trecho de valor constante: "HH:MM:SS.mmm, HH:MM:SS.mmm, numero" (início, fim, valor).
+
+    Em medições estáveis substitui milhares de linhas repetidas por uma só. Leituras inválidas
+    não interrompem o trecho. O trecho ainda aberto é gravado como última linha a cada
+    descarregamento e reescrito no seguinte, então uma queda perde no máximo o último intervalo.
+    """
+
+    def __init__(self, arquivo, inicio, **kwargs):
+        self._trecho = None     # [valor, t0, t1]
+        self._provisoria = None   # posição no arquivo da linha do trecho aberto
+        super().__init__(arquivo, inicio, **kwargs)
+
+    def _linha_do_trecho(self):
+        valor, t0, t1 = self._trecho
+        return f"{formatar_tempo(t0, decimais=3)}, {formatar_tempo(t1, decimais=3)}, {valor}\n"
+
+    def _formatar(self, leitura):
+        numero = leitura.numero_filtrado if leitura.numero_filtrado is not None else leitura.numero
+        if numero is None:
+            return None
+        t = leitura.instante - self.inicio
+        if self._trecho is not None and self._trecho[0] == numero:
+            self._trecho[2] = t
+            return None
+        linha = self._linha_do_trecho() if self._trecho is not None else None
+        self._trecho = [numero, t, t]
+        return linha
+
+    def _escrever(self, linhas):
+        self._saida.write("".join(linhas))
+
+    def descarregar(self):
+        # Remove a linha provisória do trecho aberto, grava os trechos fechados e escreve a versão atual
+        if self._provisoria is not None:
+            self._saida.seek(self._provisoria)
+            self._saida.truncate()
+            self._provisoria = None
+        super().descarregar()
+        if self._trecho is not None:
+            self._provisoria = self._saida.tell()
+            self._saida.write(self._linha_do_trecho())
+            self._saida.flush()
+
+    def fechar(self):
+        if self._trecho is not None:
+            self._pendentes.append(self._linha_do_trecho())
+            self._trecho = None
+        super().fechar()
+
+class RegistroBinario(_RegistroRotativo):
+    """Registros de largura fixa (ver `dtype_registro`), legíveis com `ler_registro_binario`; inclui leituras inválidas."""
+    modo = 'ab'
+
+    def __init__(self, arquivo, inicio, n_digitos, **kwargs):
+        self.dtype = dtype_registro(n_digitos)
+        super().__init__(arquivo, inicio, **kwargs)
+
+    def _formatar(self, leitura):
+        codigos = leitura.codigos or (CODIGO_AUSENTE,) * self.dtype['codigos'].shape[0]
+        numero = leitura.numero if leitura.numero is not None else NUMERO_INVALIDO
+        filtrado = leitura.numero_filtrado if leitura.numero_filtrado is not None else NUMERO_INVALIDO
+        return (leitura.instante - self.inicio, numero, filtrado, codigos)
+
+    def _escrever(self, registros):
+        self._saida.write(np.array(registros, dtype=self.dtype).tobytes())
+
+def arquivo_do_display(arquivo, nome, varios):
+    """Com vários displays, insere o nome antes da extensão: dados.txt -> dados_multimetro1.txt."""
+    if not varios:
+        return arquivo
+    base, ext = os.path.splitext(arquivo)
+    return f"{base}_{nome}{ext}"
+
+class RegistroPorDisplay:
+    """Encaminha cada leitura para o registro do seu display, mantendo a saída separada por instrumento."""
+
+    def __init__(self, registros):
+        self.registros = registros    # nome do display -> registro
+
+    def registrar(self, leitura):
+        registro = self.registros.get(leitura.display)
+        if registro is not None:
+            registro.registrar(leitura)
+
+    def fechar(self):
+        for registro in self.registros.values():
+            registro.fechar()
@@ -0,0 +1,119 @@
+import threading
+
+import numpy as np
+
+# ================= Série Temporal Decimada =================
+# Para desenhar medições longas com custo fixo: o histórico inteiro vira no máximo 2 pontos (mínimo e
+# máximo) por balde de tempo, e a janela recente fica em um buffer circular com as amostras brutas.
+N_BALDES_PADRAO = 500       # baldes do histórico (~largura do gráfico em pixels / 2)
+JANELA_PADRAO = 1000        # amostras recentes mantidas sem decimação
+LARGURA_INICIAL = 0.1       # s por balde no começo; dobra sempre que o histórico não cabe nos baldes
+
+def decimar_min_max(x, y, n_baldes=N_BALDES_PADRAO):
+    """Reduz (x, y), com x crescente, a no máximo 2 pontos por balde: o mínimo e o máximo, em ordem de x.
+
+    Picos isolados continuam visíveis (ao contrário de pegar uma amostra a cada k). Custo O(n).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= 2 * n_baldes:
+        return x, y
+    bordas = np.linspace(x[0], x[-1], n_baldes + 1)[1:-1]
+    inicios = np.unique(np.concatenate([[0], np.searchsorted(x, bordas, side='right')]))
+    inicios = inicios[inicios < len(x)]
+    balde = np.repeat(np.arange(len(inicios)), np.diff(np.append(inicios, len(x))))
+    escolhidos = []
+    for extremos in (np.minimum.reduceat(y, inicios), np.maximum.reduceat(y, inicios)):
+        # Primeira ocorrência do extremo dentro de cada balde
+        candidatos = np.flatnonzero(y == extremos[balde])
+        _, primeiros = np.unique(balde[candidatos], return_index=True)
+        escolhidos.append(candidatos[primeiros])
+    indices = np.unique(np.concatenate(escolhidos))
+    return x[indices], y[indices]
+
+class SerieDecimada:
+    """Série ao vivo com custo de desenho constante: histórico em baldes min/max + janela recente bruta.
+
+    `adicionar` custa O(1) amortizado (quando o histórico enche, baldes vizinhos são unidos e a largura
+    dobra); `historico()` e `recentes()` devolvem sempre no máximo 2*n_baldes e `janela` pontos.
+    Pode ser alimentada e lida por threads diferentes.
+    """
+
+    def __init__(self, n_baldes=N_BALDES_PADRAO, janela=JANELA_PADRAO, largura=LARGURA_INICIAL):
+        self.n_baldes = n_baldes
+        self.largura = largura
+        self.inicio = None
+        self.n = 0
+        self._t_min = np.zeros(n_baldes)
+        self._y_min = np.full(n_baldes, np.inf)
+        self._t_max = np.zeros(n_baldes)
+        self._y_max = np.full(n_baldes, -np.inf)
+        self._usados = 0      # baldes preenchidos (do início até o mais recente)
+        self._t = np.zeros(janela)
+        self._y = np.zeros(janela)
+        self._posicao = 0
+        self._lock = threading.Lock()
+
+    def adicionar(self, t, y):
+        with self._lock:
+            if self.inicio is None:
+                self.inicio = t
+            i = int((t - self.inicio) / self.largura)
+            while i >= self.n_baldes:
+                self._compactar()
+                i = int((t - self.inicio) / self.largura)
+            if y < self._y_min[i]:
+                self._t_min[i], self._y_min[i] = t, y
+            if y > self._y_max[i]:
+                self._t_max[i], self._y_max[i] = t, y
+            self._usados = max(self._usados, i + 1)
+            j = self._posicao % len(self._t)
+            self._t[j], self._y[j] = t, y
+            self._posicao += 1
+            self.n += 1
+
+    def _compactar(self):
+        # Une os baldes 2k e 2k+1 e dobra a largura; a metade de cima fica vazia
+        metade = self.n_baldes // 2
+        pares = slice(0, 2 * metade, 2), slice(1, 2 * metade, 2)
+        t_min, y_min, t_max, y_max = self._t_min, self._y_min, self._t_max, self._y_max
+        usa_segundo = y_min[pares[1]] < y_min[pares[0]]
+        novo_t_min = np.where(usa_segundo, t_min[pares[1]], t_min[pares[0]])
+        novo_y_min = np.minimum(y_min[pares[0]], y_min[pares[1]])
+        usa_segundo = y_max[pares[1]] > y_max[pares[0]]
+        novo_t_max = np.where(usa_segundo, t_max[pares[1]], t_max[pares[0]])
+        novo_y_max = np.maximum(y_max[pares[0]], y_max[pares[1]])
+        for destino, valores, vazio in ((t_min, novo_t_min, 0.0), (y_min, novo_y_min, np.inf),
+                                        (t_max, novo_t_max, 0.0), (y_max, novo_y_max, -np.inf)):
+            destino[:metade] = valores
+            destino[metade:] = vazio
+        self._usados = (self._usados + 1) // 2
+        self.largura *= 2
+
+    def historico(self):
+        """(t, y) do histórico decimado: mínimo e máximo de cada balde não vazio, em ordem de tempo."""
+        with self._lock:
+            u = self._usados
+            t = np.stack([self._t_min[:u], self._t_max[:u]], axis=1)
+            y = np.stack([self._y_min[:u], self._y_max[:u]], axis=1)
+        preenchidos = np.isfinite(y[:, 0])
+        t, y = t[preenchidos], y[preenchidos]
+        ordem = np.argsort(t, axis=1, kind='stable')
+        return np.take_along_axis(t, ordem, 1).ravel(), np.take_along_axis(y, ordem, 1).ravel()
+
+    def recentes(self):
+        """(t, y) das últimas amostras brutas (até `janela`), em ordem de tempo."""
+        with self._lock:
+            n = min(self._posicao, len(self._t))
+            inicio = self._posicao - n
+            indices = np.arange(inicio, self._posicao) % len(self._t)
+            return self._t[indices], self._y[indices]
+
+    def pontos(self):
+        """(t, y) para desenhar: histórico decimado até o começo da janela recente, depois as amostras brutas."""
+        t_recente, y_recente = self.recentes()
+        t_hist, y_hist = self.historico()
+        if len(t_recente):
+            antes = t_hist < t_recente[0]
+            t_hist, y_hist = t_hist[antes], y_hist[antes]
+        return np.concatenate([t_hist, t_recente]), np.concatenate([y_hist, y_recente])
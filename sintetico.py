@@ -0,0 +1,74 @@
+import os
+
+import cv2
+import numpy as np
+
+from decodificacao import MAPA_DIGITOS
+
+# ================= Gerador de Displays de 7 Segmentos Sintéticos =================
+# Gera frames BGR com segmentos escuros sobre fundo claro (como um LCD) e a configuração com os
+# templates posicionados no centro de cada segmento, para testar e medir o leitor sem tela.
+PADROES = {digito: padrao for padrao, digito in MAPA_DIGITOS.items()}
+FUNDO = 225
+SEGMENTO = 35
+
+def retangulos_segmentos(x, y, largura, altura, espessura):
+    """Retângulos (x0, y0, x1, y1) dos segmentos a..g de um dígito com canto superior esquerdo em (x, y)."""
+    meio = y + altura // 2
+    return [
+        (x + espessura, y, x + largura - espessura, y + espessura),                                  # a
+        (x + largura - espessura, y + espessura, x + largura, meio),                                 # b
+        (x + largura - espessura, meio, x + largura, y + altura - espessura),                        # c
+        (x + espessura, y + altura - espessura, x + largura - espessura, y + altura),                # d
+        (x, meio, x + espessura, y + altura - espessura),                                            # e
+        (x, y + espessura, x + espessura, meio),                                                     # f
+        (x + espessura, meio - espessura // 2, x + largura - espessura, meio + (espessura + 1) // 2),  # g
+    ]
+
+class DisplaySintetico:
+    """Display de `n_digitos` dígitos desenhado em um frame do tamanho da captura padrão."""
+
+    def __init__(self, n_digitos=4, forma=(308, 442), origem=(120, 90), largura=34, altura=70,
+                 espaco=12, espessura=7):
+        self.n_digitos = n_digitos
+        self.forma = forma
+        self.segmentos = [retangulos_segmentos(origem[0] + i * (largura + espaco), origem[1], largura, altura, espessura)
+                          for i in range(n_digitos)]
+
+    def config(self):
+        """Configuração no formato do configuracoes.json, com um ponto no centro de cada segmento."""
+        config = {}
+        for i, retangulos in enumerate(self.segmentos):
+            config[f'template_d{i}'] = [[(x0 + x1) / 2, (y0 + y1) / 2] for x0, y0, x1, y1 in retangulos]
+        return config
+
+    def desenhar(self, valor, ruido=0.0, brilho=0, deslocamento=(0, 0), rng=None):
+        """Frame BGR mostrando `valor` (com zeros à esquerda), ruído gaussiano e deslocamento opcionais."""
+        frame = np.full((*self.forma, 3), FUNDO, dtype=np.uint8)
+        dx, dy = deslocamento
+        for retangulos, caractere in zip(self.segmentos, f"{valor:0{self.n_digitos}d}"):
+            for (x0, y0, x1, y1), aceso in zip(retangulos, PADROES[int(caractere)]):
+                if aceso == '1':
+                    cv2.rectangle(frame, (x0 + dx, y0 + dy), (x1 + dx - 1, y1 + dy - 1), (SEGMENTO,) * 3, -1)
+        if ruido or brilho:
+            rng = rng if rng is not None else np.random.default_rng()
+            ajustado = frame.astype(np.float32) + brilho
+            if ruido:
+                ajustado += rng.normal(0, ruido, frame.shape)
+            frame = np.clip(ajustado, 0, 255).astype(np.uint8)
+        return frame
+
+    def sequencia(self, n_frames, frames_por_valor=5, ruido=0.0, semente=0):
+        """Gera (frames, valores): contagem crescente, cada valor mantido por `frames_por_valor` frames."""
+        rng = np.random.default_rng(semente)
+        valores = [(i // frames_por_valor) % 10 ** self.n_digitos for i in range(n_frames)]
+        frames = [self.desenhar(v, ruido=ruido, rng=rng) for v in valores]
+        return frames, valores
+
+def gravar_sequencia(diretorio, frames, valores):
+    """Grava os frames como PNG e os valores esperados em valores.txt (um por linha, na mesma ordem)."""
+    os.makedirs(diretorio, exist_ok=True)
+    for i, frame in enumerate(frames):
+        cv2.imwrite(os.path.join(diretorio, f"{i:06d}.png"), frame)
+    with open(os.path.join(diretorio, "valores.txt"), "w") as arquivo:
+        arquivo.writelines(f"{v}\n" for v in valores)
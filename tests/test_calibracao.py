@@ -0,0 +1,26 @@
+import pytest
+
+from calibracao import Calibrador
+from leitor import Display, numero_do_resultado
+from sintetico import DisplaySintetico
+
+def _acertos(display, frames, valores):
+    lidos = [numero_do_resultado(display.decodificar(display.tratar_roi(frame))[0]) for frame in frames]
+    return sum(lido == valor for lido, valor in zip(lidos, valores)) / len(valores)
+
+@pytest.mark.parametrize('metodo', ['otsu', 'meio'])
+def test_digitos_constantes_na_janela_nao_pioram_a_leitura(metodo):
+    # Contagem de 0 a 19: os dois dígitos da esquerda ficam em "0" (segmento g sempre apagado) a janela toda
+    sintetico = DisplaySintetico(4)
+    frames, valores = sintetico.sequencia(100, ruido=3)
+    display = Display('teste', dict(sintetico.config(), detectar_mudanca=False))
+    antes = _acertos(display, frames, valores)
+
+    calibrador = Calibrador(display, len(frames), metodo)
+    for frame in frames:
+        calibrador.adicionar(display.tratar_roi(frame))
+    thresholds = calibrador.aplicar()
+
+    # Pontos que não mudaram de estado ficam no threshold global, não dentro da sua classe apagada
+    assert len(set(thresholds['0'] + thresholds['1'])) == 1
+    assert _acertos(display, frames, valores) >= antes - 0.02
@@ -0,0 +1,28 @@
+import pytest
+
+import sintetico
+from leitor import Display
+from sintetico import DisplaySintetico
+
+@pytest.mark.parametrize('segmento', [sintetico.SEGMENTO, 140])
+def test_troca_de_um_segmento_nao_repete_leitura(monkeypatch, segmento):
+    # 888888 -> 888880 apaga só o segmento g do último dígito; a leitura anterior não pode ser reaproveitada
+    monkeypatch.setattr(sintetico, 'SEGMENTO', segmento)
+    display_sintetico = DisplaySintetico(6, largura=26, altura=50, espaco=8, espessura=5)
+    display = Display('teste', display_sintetico.config())
+
+    _, resultado, _, _, repetida = display.ler(display_sintetico.desenhar(888888))
+    assert "".join(resultado) == "888888" and not repetida
+
+    _, resultado, _, _, repetida = display.ler(display_sintetico.desenhar(888880))
+    assert "".join(resultado) == "888880"
+    assert not repetida
+
+def test_frame_igual_reaproveita_leitura():
+    display_sintetico = DisplaySintetico(4)
+    display = Display('teste', display_sintetico.config())
+    frame = display_sintetico.desenhar(1234)
+    display.ler(frame)
+    _, resultado, _, _, repetida = display.ler(frame.copy())
+    assert "".join(resultado) == "1234"
+    assert repetida
@@ -0,0 +1,20 @@
+import numpy as np
+
+from captura import CapturaMemoria
+from leitor import LeitorDisplay
+from sintetico import DisplaySintetico
+
+def test_luminosidades_da_leitura_sao_as_decodificadas():
+    # O preview mostra leitura.luminosidades: têm de ser os valores comparados com os thresholds
+    sintetico = DisplaySintetico(4)
+    frame = sintetico.desenhar(1234, ruido=6, rng=np.random.default_rng(0))
+    leitor = LeitorDisplay(sintetico.config(), captura=CapturaMemoria([frame]))
+    leitura, = leitor.processar(*leitor.capturar())
+
+    display = leitor.display
+    for dig, codigo in zip(display.digitos, leitura.codigos):
+        luminosidades = np.array(leitura.luminosidades[dig])
+        ativos = luminosidades < display.threshold_template[dig]
+        assert int("".join("1" if a else "0" for a in ativos), 2) == codigo
+    digitos, amostras = display.amostrar(leitura.frame_processado)
+    assert [leitura.luminosidades[dig] for dig in digitos] == amostras.tolist()
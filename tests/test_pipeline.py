@@ -0,0 +1,26 @@
+import time
+
+from captura import CapturaMemoria
+from leitor import LeitorDisplay
+from pipeline import PipelineLeitura
+from sintetico import DisplaySintetico
+
+def test_saida_lenta_nao_descarta_leituras():
+    # Com a saída travada (disco lento), o excesso tem de sair da fila de frames, não das leituras
+    sintetico = DisplaySintetico(4)
+    frames, valores = sintetico.sequencia(60, frames_por_valor=1)
+    leitor = LeitorDisplay(dict(sintetico.config(), detectar_mudanca=False), captura=CapturaMemoria(frames))
+    pipeline = PipelineLeitura(leitor, tamanho_fila=2)
+    gravadas = []
+    def gravar(leitura):
+        time.sleep(0.005)
+        gravadas.append(leitura.numero)
+    pipeline.inscrever_saida(gravar)
+    pipeline.iniciar()
+    assert pipeline.aguardar(timeout=30)
+
+    profundidades = pipeline.profundidades()
+    assert profundidades['leituras_descartadas'] == 0
+    assert profundidades['frames_descartados'] > 0
+    assert len(gravadas) == len(frames) - profundidades['frames_descartados']
+    assert all(numero in valores for numero in gravadas)
@@ -0,0 +1,38 @@
+from leitor import Leitura
+from registro import (NUMERO_INVALIDO, RegistroBinario, RegistroRLE, RegistroTexto, ler_registro_binario,
+                      ler_registro_texto)
+
+def _leitura(instante, numero):
+    return Leitura(instante, None, None, [], numero, codigos=(0, 1), numero_filtrado=numero)
+
+def test_binario_distingue_menos_um_de_leitura_invalida(tmp_path):
+    arquivo = str(tmp_path / "registro.bin")
+    registro = RegistroBinario(arquivo, 0.0, 2)
+    for instante, numero in enumerate([-1, None, 5]):
+        registro.registrar(_leitura(instante, numero))
+    registro.fechar()
+
+    registros = ler_registro_binario(arquivo, 2)
+    assert registros['numero'].tolist() == [-1, NUMERO_INVALIDO, 5]
+    assert registros['filtrado'].tolist() == [-1, NUMERO_INVALIDO, 5]
+
+def test_texto_rle_lido_como_pontos_no_inicio_e_no_fim(tmp_path):
+    arquivo = str(tmp_path / "dados.txt")
+    registro = RegistroRLE(arquivo, 0.0)
+    for instante, numero in [(0.0, 5), (1.0, 5), (2.0, -1), (2.5, 7)]:
+        registro.registrar(_leitura(instante, numero))
+    registro.fechar()
+
+    segundos, numeros = ler_registro_texto(arquivo)
+    assert segundos.tolist() == [0.0, 1.0, 2.0, 2.5]
+    assert numeros.tolist() == [5, 5, -1, 7]
+
+def test_texto_rotaciona_ao_passar_do_limite(tmp_path):
+    arquivo = str(tmp_path / "dados.txt")
+    registro = RegistroTexto(arquivo, 0.0, lote=1, max_bytes=100, max_arquivos=3)
+    for instante in range(50):
+        registro.registrar(_leitura(float(instante), instante))
+    registro.fechar()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dados.txt", "dados.txt.1", "dados.txt.2"]
+    assert all(p.stat().st_size < 100 + 40 for p in tmp_path.iterdir())
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from Trata import CorretorOffsets, corrigir_offsets_array, tratar_offsets_streaming, tratar_offsets_vetorizado
+
+def _corrigir_offsets_original(valores, thr):
+    # Laço do Trata.py original, referência dos dois modos
+    temperaturas = list(valores)
+    for i in range(2, len(temperaturas)):
+        if abs(temperaturas[i] - temperaturas[i-1]) > thr:
+            temperaturas[i] = (temperaturas[i-2] + temperaturas[i-1]) // 2
+    return temperaturas
+
+def _series_aleatorias(n_series, semente=0):
+    # Passeios aleatórios com picos isolados, degraus e saltos seguidos, de tamanhos e thresholds variados
+    rng = np.random.default_rng(semente)
+    for _ in range(n_series):
+        tamanho = int(rng.integers(0, 300))
+        thr = int(rng.integers(0, 60))
+        valores = np.cumsum(rng.integers(-thr - 5, thr + 6, tamanho))
+        picos = rng.random(tamanho) < rng.uniform(0, 0.5)
+        valores[picos] += rng.integers(-500, 501, int(picos.sum()))
+        yield valores.tolist(), thr
+
+@pytest.mark.parametrize('valores, thr', list(_series_aleatorias(500)))
+def test_modos_identicos_ao_laco_original(valores, thr):
+    esperado = _corrigir_offsets_original(valores, thr)
+    corretor = CorretorOffsets(thr)
+    assert [corretor.corrigir(valor) for valor in valores] == esperado
+    assert corrigir_offsets_array(valores, thr).tolist() == esperado
+
+def test_arquivos_identicos_nos_dois_modos(tmp_path):
+    valores, thr = next(_series_aleatorias(1, semente=1))
+    entrada = tmp_path / "dados.txt"
+    entrada.write_text("".join(f"00:00:{i % 60:02}, {valor}\n" for i, valor in enumerate(valores)))
+    tratar_offsets_streaming(str(entrada), str(tmp_path / "streaming.txt"), thr)
+    tratar_offsets_vetorizado(str(entrada), str(tmp_path / "vetorizado.txt"), thr)
+    streaming = (tmp_path / "streaming.txt").read_text()
+    assert streaming == (tmp_path / "vetorizado.txt").read_text()
+    assert [int(linha.split(', ')[1]) for linha in streaming.splitlines()] == _corrigir_offsets_original(valores, thr)
+
+def test_registro_rle_mantem_o_formato(tmp_path):
+    # No RLE cada trecho ("início, fim, valor") é uma amostra; o pico isolado é corrigido
+    entrada = tmp_path / "dados.txt"
+    entrada.write_text("00:00:00.000, 00:00:01.000, 100\n"
+                       "00:00:01.100, 00:00:02.000, 101\n"
+                       "00:00:02.100, 00:00:02.100, 900\n"
+                       "00:00:02.200, 00:00:03.000, 102\n")
+    tratar_offsets_streaming(str(entrada), str(tmp_path / "streaming.txt"), 22)
+    tratar_offsets_vetorizado(str(entrada), str(tmp_path / "vetorizado.txt"), 22)
+    esperado = ("00:00:00.000, 00:00:01.000, 100\n"
+                "00:00:01.100, 00:00:02.000, 101\n"
+                "00:00:02.100, 00:00:02.100, 100\n"
+                "00:00:02.200, 00:00:03.000, 102\n")
+    assert (tmp_path / "streaming.txt").read_text() == esperado
+    assert (tmp_path / "vetorizado.txt").read_text() == esperado